@@ -1,8 +1,11 @@
 # app/__init__.py
 
 from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
 from .config import Config
-from .extensions import db, migrate
+from .extensions import db, migrate, connect_with_search_path
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -12,6 +15,11 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # schema auditoria en cada conexión nueva del pool (el listener filtra
+    # PostgreSQL); una sola vez por proceso aunque se cree más de una app
+    if not event.contains(Engine, "do_connect", connect_with_search_path):
+        event.listen(Engine, "do_connect", connect_with_search_path)
+
     # Registrar blueprints
     from .blueprints.web.routes import web_bp
     from .blueprints.api.routes import api_bp
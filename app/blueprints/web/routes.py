@@ -8,7 +8,6 @@ from flask import (
     flash, send_file, current_app
 )
 
-from sqlalchemy import text  # ✅ NUEVO
 
 from app.extensions import db
 from app.models import (
@@ -41,8 +40,7 @@ def upload():
 
         naviera = (form.naviera.data or "COSCO").upper().strip()
 
-        # ✅ Blindaje: garantizar schema en ESTA conexión (no depende de ALTER ROLE)
-        db.session.execute(text("SET search_path TO auditoria, public;"))
+        # search_path lo fija el listener "connect" del engine (create_app)
 
         # ✅ Diagnóstico (temporal): confirmar qué tabla usa el modelo en runtime
         try:
@@ -18,6 +18,13 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = uri
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # pool_pre_ping: Render corta conexiones ociosas (worker en backoff largo,
+    # web sin tráfico); se valida la conexión al sacarla del pool
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_pre_ping": True,
+    }
 
     # Rutas de archivos
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
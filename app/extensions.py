@@ -4,4 +4,32 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+
+
+def set_search_path(dbapi_conn, connection_record):
+    """
+    Fija search_path una vez por conexión física del pool (antes se repetía
+    con un SET en cada poll del worker / cada upload).
+    Autocommit para que el rollback de reset del pool no lo deshaga.
+    """
+    autocommit = dbapi_conn.autocommit
+    dbapi_conn.autocommit = True
+    cur = dbapi_conn.cursor()
+    cur.execute("SET search_path TO auditoria, public")
+    cur.close()
+    dbapi_conn.autocommit = autocommit
+
+
+def connect_with_search_path(dialect, conn_rec, cargs, cparams):
+    """
+    Listener "do_connect" a nivel clase Engine: no hace falta crear/tocar
+    db.engine al armar la app (CLI, migraciones). Solo en PostgreSQL abre la
+    conexión física y le fija search_path; otros dialectos (SQLite en tests)
+    siguen con el connect() por defecto.
+    """
+    if dialect.name != "postgresql":
+        return None
+    dbapi_conn = dialect.connect(*cargs, **cparams)
+    set_search_path(dbapi_conn, conn_rec)
+    return dbapi_conn
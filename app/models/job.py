@@ -1,9 +1,17 @@
 # app/models/job.py
 
-from datetime import datetime
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+
 from app.extensions import db
 
 
+def _utcnow() -> datetime:
+    # UTC naive (columnas DateTime sin tz), sin datetime.utcnow() (deprecado en 3.12)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Job(db.Model):
     __tablename__ = "jobs"
     __table_args__ = {"schema": "auditoria"}
@@ -13,7 +21,7 @@ class Job(db.Model):
     status = db.Column(db.String(30), nullable=False, default="CREATED")
     naviera = db.Column(db.String(30), nullable=False, default="COSCO")
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=_utcnow)
     finished_at = db.Column(db.DateTime)
 
     error_message = db.Column(db.Text)
@@ -23,9 +31,37 @@ class Job(db.Model):
 
     def mark_done(self):
         self.status = "DONE"
-        self.finished_at = datetime.utcnow()
+        self.finished_at = _utcnow()
+
+    def mark_done_empty(self):
+        # terminó bien pero la conciliación no produjo filas (ej. archivos sin guías)
+        self.status = "DONE_EMPTY"
+        self.finished_at = _utcnow()
+
+    @classmethod
+    def claim_next(cls, limit: int = 1) -> list[int]:
+        """
+        Toma hasta `limit` jobs QUEUED (más viejo primero) y los pasa a RUNNING
+        en un solo UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+        RETURNING id. Sin commit: lo hace quien llama.
+        """
+        picked = (
+            select(cls.id)
+            .where(cls.status == "QUEUED")
+            .order_by(cls.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(cls)
+            .where(cls.id.in_(picked.scalar_subquery()))
+            .values(status="RUNNING", error_message=None)
+            .returning(cls.id)
+            .execution_options(synchronize_session=False)
+        )
+        return sorted(db.session.execute(stmt).scalars())
 
     def mark_failed(self, error):
         self.status = "FAILED"
         self.error_message = str(error)
-        self.finished_at = datetime.utcnow()
\ No newline at end of file
+        self.finished_at = _utcnow()
\ No newline at end of file
@@ -1 +1,14 @@
-# app/parsers/__init__.py
\ No newline at end of file
+# app/parsers/__init__.py
+
+from .fils_auditoria import FILSAuditoriaParser
+from .cosco_facturacion import COSCOFacturacionParser
+from .one_facturacion import ONEFacturacionParser
+
+# parsers sin estado: una instancia por proceso, compartida por precheck y job_runner
+FILS_PARSER = FILSAuditoriaParser()
+
+# naviera -> parser de facturación (único registro: agregar navieras solo aquí)
+NAVIERA_PARSERS = {
+    "COSCO": COSCOFacturacionParser(),
+    "ONE": ONEFacturacionParser(),
+}
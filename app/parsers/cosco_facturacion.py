@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Iterable, Optional, Any
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from openpyxl import load_workbook
 
 from app.parsers.base import BaseParser
@@ -35,7 +36,7 @@ class COSCOFacturacionParser(BaseParser):
             meta["errors"].append(f"COSCO: no se pudo abrir el Excel: {e}")
             return meta
 
-        try:
+        with closing(wb):
             sheets = [ws.title for ws in wb.worksheets]
             meta["sheets"] = sheets
             if not sheets:
@@ -72,19 +73,12 @@ class COSCOFacturacionParser(BaseParser):
             }
             return meta
 
-        finally:
-            try:
-                wb.close()
-            except Exception:
-                pass
-
     def parse(self, path: str) -> Iterable[dict]:
         """
         Streaming generator multihoja.
         Si una hoja no tiene guia/total, se ignora.
         """
-        wb = load_workbook(filename=path, read_only=True, data_only=True)
-        try:
+        with closing(load_workbook(filename=path, read_only=True, data_only=True)) as wb:
             for ws in wb.worksheets:
                 sheet_name = ws.title
 
@@ -103,40 +97,39 @@ class COSCOFacturacionParser(BaseParser):
                     # hoja no usable
                     continue
 
-                cont_i = idx.get("contenedor")
-                ruta_i = idx.get("ruta")
-                predio_i = idx.get("predio")
+                # getters con el índice ya resuelto para esta hoja (sin chequeos por fila)
+                get_guia = self._getter(guia_i)
+                get_total = self._getter(total_i)
+                get_cont = self._getter(idx.get("contenedor"))
+                get_ruta = self._getter(idx.get("ruta"))
+                get_predio = self._getter(idx.get("predio"))
 
                 for row in ws.iter_rows(min_row=2, values_only=True):
-                    guia = normalize_guia(self._cell(row, guia_i))
+                    guia = normalize_guia(get_guia(row))
                     if not guia:
                         continue
 
                     yield {
                         "guia": guia,
-                        "contenedor": normalize_contenedor(self._cell(row, cont_i)) if cont_i is not None else "",
-                        "total_naviera": normalize_amount(self._cell(row, total_i)) or 0,
-                        "ruta": str(self._cell(row, ruta_i) or "").strip() if ruta_i is not None else "",
-                        "predio": str(self._cell(row, predio_i) or "").strip() if predio_i is not None else "",
+                        "contenedor": normalize_contenedor(get_cont(row)),
+                        "total_naviera": normalize_amount(get_total(row)) or 0,
+                        "ruta": str(get_ruta(row) or "").strip(),
+                        "predio": str(get_predio(row) or "").strip(),
                         "sheet": sheet_name,
                     }
 
-        finally:
-            try:
-                wb.close()
-            except Exception:
-                pass
-
     # -------------------------
     # Helpers
     # -------------------------
 
-    def _cell(self, row: Any, idx: Optional[int]):
-        if idx is None:
-            return None
-        if idx < 0:
-            return None
-        return row[idx] if idx < len(row) else None
+    def _getter(self, idx: Optional[int]) -> Callable[[Any], Any]:
+        """
+        Lector de celda especializado para un índice fijo.
+        Columna inexistente o fila corta -> None.
+        """
+        if idx is None or idx < 0:
+            return lambda row: None
+        return lambda row: row[idx] if idx < len(row) else None
 
     def _colname(self, headers_raw: List[str], idx: Optional[int]) -> str:
         if idx is None:
@@ -145,13 +138,17 @@ class COSCOFacturacionParser(BaseParser):
 
     def _map_header_indices(self, headers_raw: List[str]) -> Dict[str, Optional[int]]:
         headers_norm = [upper_clean(h) for h in headers_raw]
+        # header normalizado -> primer índice, armado una vez para todos los grupos
+        first_idx: Dict[str, int] = {}
+        for j, hn in enumerate(headers_norm):
+            first_idx.setdefault(hn, j)
 
         def find_idx(options: List[str]) -> Optional[int]:
             opts_norm = [upper_clean(o) for o in options]
-            # exact
-            for j, hn in enumerate(headers_norm):
-                if hn in opts_norm:
-                    return j
+            # exact (gana la primera columna, como en el scan)
+            hits = [first_idx[o] for o in opts_norm if o in first_idx]
+            if hits:
+                return min(hits)
             # contains
             for j, hn in enumerate(headers_norm):
                 for o in opts_norm:
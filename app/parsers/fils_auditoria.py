@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+from contextlib import closing
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
-from typing import Dict, Iterable, List, Optional, Tuple, Any
+import unicodedata
+from itertools import chain, islice
+from sys import intern
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Any
 
 from openpyxl import load_workbook
 
@@ -22,10 +27,26 @@ SHEET_CONTENEDOR = "Contenedor"
 SHEET_CARGOS = "Cargos Adicionales"
 
 
-def _norm_header(s: Any) -> str:
+# Tildes/diéresis/ñ más comunes (español/portugués) -> ASCII, en C vía str.translate
+_ACCENTS = str.maketrans("áàâãäéèêëíìîïóòôõöúùûüñç", "aaaaaeeeeiiiiooooouuuunc")
+
+
+def _header_label(s: Any) -> str:
+    # header tal cual se expone (preview / iter_rows): solo trim + lower
     return str(s or "").strip().lower()
 
 
+def _norm_header(s: Any) -> str:
+    """
+    Forma de comparación de headers: lower + sin tildes + espacios colapsados.
+    Lo que no cubra la tabla (raro en headers) cae a unicodedata.
+    """
+    h = str(s or "").lower().translate(_ACCENTS)
+    if not h.isascii():
+        h = "".join(c for c in unicodedata.normalize("NFKD", h) if not unicodedata.combining(c))
+    return " ".join(h.split())
+
+
 def _parse_fecha(value) -> Optional[datetime]:
     """
     FILS suele traer "01/10/2025 08:49" como string,
@@ -39,6 +60,28 @@ def _parse_fecha(value) -> Optional[datetime]:
     s = str(value).strip()
     if not s:
         return None
+    return _parse_fecha_str(s)
+
+
+@lru_cache(maxsize=4096)
+def _parse_fecha_str(s: str) -> Optional[datetime]:
+    """
+    Las fechas se repiten mucho entre filas: cacheamos por string.
+    Camino rápido a mano para "dd/mm/YYYY HH:MM"; el resto va por strptime.
+    """
+    try:
+        d, m, rest = s.split("/", 2)
+        y, hm = rest.split(" ", 1)
+        hh, mi = hm.split(":", 1)
+        if (
+            len(y) == 4
+            and all(0 < len(p) <= 2 for p in (d, m, hh, mi))
+            and (d + m + y + hh + mi).isascii()
+            and (d + m + y + hh + mi).isdigit()
+        ):
+            return datetime(int(y), int(m), int(d), int(hh), int(mi))
+    except ValueError:
+        pass
 
     # formatos comunes
     for fmt in ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y/%m/%d %H:%M:%S.%f"):
@@ -50,6 +93,23 @@ def _parse_fecha(value) -> Optional[datetime]:
     return None
 
 
+def _is_blank_row(row) -> bool:
+    """
+    True si todas las celdas están vacías. Corta en la primera celda con dato
+    y solo hace strip() sobre strings (números/fechas nunca son vacíos).
+    """
+    for v in row:
+        if v is None:
+            continue
+        if type(v) is str:
+            if v.strip():
+                return False
+            continue
+        if str(v).strip():
+            return False
+    return True
+
+
 def _looks_like_header_row(values: List[Any]) -> bool:
     """
     Header válido si contiene palabras clave y varias columnas string.
@@ -61,47 +121,66 @@ def _looks_like_header_row(values: List[Any]) -> bool:
     joined = " ".join(cols)
     # Palabras clave que sí o sí aparecen en headers FILS
     hits = 0
-    for kw in ("numero guia", "número guía", "accion", "acción", "fecha", "estado"):
+    for kw in ("numero guia", "accion", "fecha", "estado"):
         if kw in joined:
             hits += 1
     return hits >= 2
 
 
-def _find_header(ws, max_scan_rows: int = 10) -> Tuple[int, List[str]]:
+def _read_top_rows(ws, n: int) -> List[List[Any]]:
+    """
+    Lee las primeras n filas en UNA pasada.
+    En read_only, cada ws[r] vuelve a parsear el XML de la hoja desde el inicio.
+    """
+    return [list(r) for r in ws.iter_rows(min_row=1, max_row=n, values_only=True)]
+
+
+def _scan_sheet(ws, n: int = 10) -> Tuple[List[Any], Iterator[Any]]:
+    """
+    UN solo iter_rows por hoja: separa las primeras n filas (detección de header)
+    del resto. Las filas de datos salen del mismo iterador (chain(top[hr:], rest)),
+    sin volver a parsear el XML desde el inicio.
+    """
+    it = ws.iter_rows(min_row=1, values_only=True)
+    return list(islice(it, n)), it
+
+
+def _find_header(ws, max_scan_rows: int = 10, top_rows: Optional[List[List[Any]]] = None) -> Tuple[int, List[str]]:
     """
     Detecta en qué fila está el header.
     Retorna (row_index_1based, headers_lower)
     """
-    for r in range(1, max_scan_rows + 1):
-        values = [c.value for c in ws[r]]
+    if top_rows is None:
+        top_rows = _read_top_rows(ws, max_scan_rows)
+
+    for r, values in enumerate(top_rows[:max_scan_rows], start=1):
         if _looks_like_header_row(values):
-            headers = [_norm_header(v) for v in values]
+            headers = [_header_label(v) for v in values]
             return r, headers
     # fallback: fila 1
-    values = [c.value for c in ws[1]]
-    headers = [_norm_header(v) for v in values]
+    values = top_rows[0] if top_rows else []
+    headers = [_header_label(v) for v in values]
     return 1, headers
 
 
 def _build_index(headers: List[str]) -> Dict[str, int]:
     """
     Mapea columnas relevantes -> índice.
-    Se toleran variantes con/ sin tildes y “numero/número”.
+    Se toleran variantes con/ sin tildes y “numero/número” (_norm_header).
     """
-    # Normalizamos “número” a “numero” para comparar
-    def hnorm(x: str) -> str:
-        return (x or "").replace("número", "numero").strip().lower()
-
-    norm_headers = [hnorm(h) for h in headers]
+    norm_headers = [_norm_header(h) for h in headers]
+    # header normalizado -> primer índice (exact match en O(1))
+    exact: Dict[str, int] = {}
+    for i, h in enumerate(norm_headers):
+        exact.setdefault(h, i)
 
     def find(*cands: str) -> Optional[int]:
         for cand in cands:
-            c = hnorm(cand)
-            # exact
-            for i, h in enumerate(norm_headers):
-                if h == c:
-                    return i
-            # contains
+            c = _norm_header(cand)
+            i = exact.get(c)
+            if i is not None:
+                return i
+            # contains (solo si no hubo exact)
             for i, h in enumerate(norm_headers):
                 if c in h:
                     return i
@@ -130,7 +209,7 @@ def _build_index(headers: List[str]) -> Dict[str, int]:
     return idx
 
 
-def _cell(row: List[Any], i: Optional[int]) -> Any:
+def _cell(row: Sequence[Any], i: Optional[int]) -> Any:
     if i is None:
         return None
     if i < 0 or i >= len(row):
@@ -138,8 +217,30 @@ def _cell(row: List[Any], i: Optional[int]) -> Any:
     return row[i]
 
 
+@dataclass(slots=True)
+class _CargoEvent:
+    """Evento de la hoja Cargos Adicionales (interno; la salida de parse sigue siendo dict)."""
+    cargo_id: str
+    cargo: str
+    tipo_cargo: str
+    accion: str
+    fecha: Optional[datetime]
+    monto: Any
+    fecha_key: datetime  # fecha o datetime.min: comparación sin ramas por None
+    eliminado: bool = False
+
+
+def _as_str_stripped(v: Any) -> str:
+    """
+    Igual a str(v or "").strip(), sin el str() extra cuando la celda ya es str.
+    """
+    if type(v) is str:
+        return v.strip()
+    return str(v).strip() if v else ""
+
+
 def _cargo_key(cargo_id: Any, cargo_name: Any) -> str:
-    cid = str(cargo_id or "").strip()
+    cid = _as_str_stripped(cargo_id)
     if cid:
         return f"ID:{cid}"
     return str(cargo_name or "CARGO").strip().upper()
@@ -157,34 +258,32 @@ class FILSAuditoriaParser(BaseParser):
         issues = []
         meta = {}
 
-        wb = load_workbook(path, read_only=True, data_only=True)
-
-        sheets = wb.sheetnames
-        meta["sheets"] = sheets
+        with closing(load_workbook(path, read_only=True, data_only=True)) as wb:
+            sheets = wb.sheetnames
+            meta["sheets"] = sheets
 
-        def has(name: str) -> bool:
-            return name in sheets
+            def has(name: str) -> bool:
+                return name in sheets
 
-        if not has(SHEET_GUIA):
-            issues.append({"level": "ERROR", "message": f"Falta hoja '{SHEET_GUIA}' en FILS."})
-        if not has(SHEET_CONTENEDOR):
-            issues.append({"level": "WARN", "message": f"Falta hoja '{SHEET_CONTENEDOR}'. ONE sin guía podría no matchear."})
-        if not has(SHEET_CARGOS):
-            issues.append({"level": "WARN", "message": f"Falta hoja '{SHEET_CARGOS}'. No se podrán comparar cargos adicionales."})
+            if not has(SHEET_GUIA):
+                issues.append({"level": "ERROR", "message": f"Falta hoja '{SHEET_GUIA}' en FILS."})
+            if not has(SHEET_CONTENEDOR):
+                issues.append({"level": "WARN", "message": f"Falta hoja '{SHEET_CONTENEDOR}'. ONE sin guía podría no matchear."})
+            if not has(SHEET_CARGOS):
+                issues.append({"level": "WARN", "message": f"Falta hoja '{SHEET_CARGOS}'. No se podrán comparar cargos adicionales."})
 
-        # Header preview de Guía
-        if has(SHEET_GUIA):
-            ws = wb[SHEET_GUIA]
-            hr, headers = _find_header(ws)
-            meta["guia_header_row"] = hr
-            meta["guia_headers_preview"] = headers[:30]
+            # Header preview de Guía
+            if has(SHEET_GUIA):
+                ws = wb[SHEET_GUIA]
+                hr, headers = _find_header(ws)
+                meta["guia_header_row"] = hr
+                meta["guia_headers_preview"] = headers[:30]
 
-            idx = _build_index(headers)
-            missing = [k for k in ("guia", "fecha", "estado") if idx.get(k) is None]
-            if missing:
-                issues.append({"level": "ERROR", "message": f"Hoja '{SHEET_GUIA}': faltan columnas requeridas: {missing}."})
+                idx = _build_index(headers)
+                missing = [k for k in ("guia", "fecha", "estado") if idx.get(k) is None]
+                if missing:
+                    issues.append({"level": "ERROR", "message": f"Hoja '{SHEET_GUIA}': faltan columnas requeridas: {missing}."})
 
-        wb.close()
         ok = not any(i["level"] == "ERROR" for i in issues)
         return {"ok": ok, "issues": issues, "meta": meta}
 
@@ -196,36 +295,32 @@ class FILSAuditoriaParser(BaseParser):
 
         Si header_row no cuadra con un header real, detecta automáticamente.
         """
-        wb = load_workbook(path, read_only=True, data_only=True)
-
-        if sheet not in wb.sheetnames:
-            wb.close()
-            raise ValueError(f"FILS: no existe la hoja '{sheet}'. Hojas: {wb.sheetnames}")
-
-        ws = wb[sheet]
-
-        # decidir header row
-        if header_row is not None:
-            # validamos que realmente parezca header
-            values = [c.value for c in ws[header_row]]
-            if not _looks_like_header_row(values):
-                # buscar automático
-                hr, headers = _find_header(ws)
-                logger.warning(f"Encabezado no detectado claramente en la fila {header_row}; usando fila {hr} como encabezado en '{sheet}'.")
+        with closing(load_workbook(path, read_only=True, data_only=True)) as wb:
+            if sheet not in wb.sheetnames:
+                raise ValueError(f"FILS: no existe la hoja '{sheet}'. Hojas: {wb.sheetnames}")
+
+            ws = wb[sheet]
+
+            # decidir header row (misma lectura sirve para validar, buscar y recorrer)
+            top_rows, rest = _scan_sheet(ws, max(header_row or 0, 10))
+            if header_row is not None:
+                # validamos que realmente parezca header
+                values = top_rows[header_row - 1] if header_row <= len(top_rows) else []
+                if not _looks_like_header_row(values):
+                    # buscar automático
+                    hr, headers = _find_header(ws, top_rows=top_rows)
+                    logger.warning(f"Encabezado no detectado claramente en la fila {header_row}; usando fila {hr} como encabezado en '{sheet}'.")
+                else:
+                    hr = header_row
+                    headers = [_header_label(v) for v in values]
             else:
-                hr = header_row
-                headers = [_norm_header(v) for v in values]
-        else:
-            hr, headers = _find_header(ws)
+                hr, headers = _find_header(ws, top_rows=top_rows)
 
-        # recorrer filas posteriores al header
-        for r in ws.iter_rows(min_row=hr + 1, values_only=True):
-            row = list(r)
-            if all(v is None or str(v).strip() == "" for v in row):
-                continue
-            yield headers, row
-
-        wb.close()
+            # recorrer filas posteriores al header
+            for r in chain(top_rows[hr:], rest):
+                if _is_blank_row(r):
+                    continue
+                yield headers, list(r)
 
     def parse(self, path: str) -> List[dict]:
         """
@@ -233,16 +328,17 @@ class FILSAuditoriaParser(BaseParser):
           - contenedor (desde hoja Contenedor)
           - cargos (desde hoja Cargos Adicionales, última acción por cargo, excluye Eliminar)
         """
-        wb = load_workbook(path, read_only=True, data_only=True)
-        try:
+        with closing(load_workbook(path, read_only=True, data_only=True)) as wb:
             if SHEET_GUIA not in wb.sheetnames:
                 raise ValueError(f"FILS: falta hoja '{SHEET_GUIA}'.")
 
             # 1) Mapa guía -> contenedor (último por fecha)
-            guia_to_cont: Dict[str, Tuple[Optional[datetime], str]] = {}
+            # guía -> (fecha_key, contenedor); fecha_key = fecha o datetime.min (sin None)
+            guia_to_cont: Dict[str, Tuple[datetime, str]] = {}
             if SHEET_CONTENEDOR in wb.sheetnames:
                 ws = wb[SHEET_CONTENEDOR]
-                hr, headers = _find_header(ws)
+                top, rest = _scan_sheet(ws)
+                hr, headers = _find_header(ws, top_rows=top)
                 idx = _build_index(headers)
 
                 if idx.get("guia") is None:
@@ -250,29 +346,32 @@ class FILSAuditoriaParser(BaseParser):
                 if idx.get("contenedor") is None:
                     raise ValueError("FILS/Contenedor: no se encontró columna 'Contenedor'.")
 
-                for row in ws.iter_rows(min_row=hr + 1, values_only=True):
-                    row = list(row)
-                    g = normalize_guia(_cell(row, idx["guia"]))
+                # índices resueltos una sola vez, fuera del loop
+                i_guia, i_cont, i_fecha = idx["guia"], idx["contenedor"], idx.get("fecha")
+
+                for row in chain(top[hr:], rest):
+                    g = normalize_guia(_cell(row, i_guia))
                     if not g:
                         continue
+                    g = intern(g)
 
-                    cont = normalize_contenedor(_cell(row, idx["contenedor"]))
-                    cont = cont.replace("-", "")  # normalización extra
+                    cont = normalize_contenedor(_cell(row, i_cont))
                     if not cont:
                         continue
 
-                    f = _parse_fecha(_cell(row, idx.get("fecha")))
+                    f_key = _parse_fecha(_cell(row, i_fecha)) or datetime.min
                     prev = guia_to_cont.get(g)
                     # quedarnos con el más reciente
-                    if prev is None or ((f or datetime.min) >= (prev[0] or datetime.min)):
-                        guia_to_cont[g] = (f, cont)
+                    if prev is None or f_key >= prev[0]:
+                        guia_to_cont[g] = (f_key, cont)
 
             # 2) Mapa guía -> cargos (última acción por cargo key)
             #    key = cargo_id si existe, si no cargo nombre.
-            guia_to_cargos: Dict[str, Dict[str, dict]] = {}
+            guia_to_cargos: Dict[str, Dict[str, _CargoEvent]] = {}
             if SHEET_CARGOS in wb.sheetnames:
                 ws = wb[SHEET_CARGOS]
-                hr, headers = _find_header(ws)
+                top, rest = _scan_sheet(ws)
+                hr, headers = _find_header(ws, top_rows=top)
                 idx = _build_index(headers)
 
                 if idx.get("guia") is None:
@@ -286,30 +385,37 @@ class FILSAuditoriaParser(BaseParser):
                 if idx.get("cargo") is None and idx.get("cargo_id") is None:
                     raise ValueError("FILS/Cargos Adicionales: no se encontró columna de 'Cargo' ni 'Cargo Id'.")
 
-                # guardamos el último evento por (guía, cargo_key)
-                for row in ws.iter_rows(min_row=hr + 1, values_only=True):
-                    row = list(row)
+                i_guia, i_accion, i_fecha = idx["guia"], idx["accion"], idx["fecha"]
+                i_cargo_id, i_cargo, i_monto = idx.get("cargo_id"), idx.get("cargo"), idx["monto_naviera"]
+
+                cargo_keys: Dict[str, str] = {}
 
-                    g = normalize_guia(_cell(row, idx["guia"]))
+                # guardamos el último evento por (guía, cargo_key)
+                for row in chain(top[hr:], rest):
+                    g = normalize_guia(_cell(row, i_guia))
                     if not g:
                         continue
+                    g = intern(g)
 
-                    accion = str(_cell(row, idx["accion"]) or "").strip().lower()
-                    f = _parse_fecha(_cell(row, idx["fecha"]))
-                    cargo_id = _cell(row, idx.get("cargo_id"))
-                    cargo_name = _cell(row, idx.get("cargo"))
+                    accion = _as_str_stripped(_cell(row, i_accion)).lower()
+                    f = _parse_fecha(_cell(row, i_fecha))
+                    cargo_id = _cell(row, i_cargo_id)
+                    cargo_name = _cell(row, i_cargo)
                     key = _cargo_key(cargo_id, cargo_name)
-
-                    monto = parse_money(_cell(row, idx["monto_naviera"]))
-
-                    event = {
-                        "cargo_id": str(cargo_id or "").strip(),
-                        "cargo": str(cargo_name or "").strip() if cargo_name is not None else "",
-                        "tipo_cargo": key,  # para reconciliation
-                        "accion": accion,
-                        "fecha": f,
-                        "monto": monto,
-                    }
+                    key = cargo_keys.setdefault(key, key)  # pocas claves distintas: una sola instancia c/u
+
+                    monto = parse_money(_cell(row, i_monto))
+
+                    event = _CargoEvent(
+                        cargo_id=_as_str_stripped(cargo_id),
+                        cargo=_as_str_stripped(cargo_name),
+                        tipo_cargo=key,  # para reconciliation
+                        accion=accion,
+                        fecha=f,
+                        monto=monto,
+                        fecha_key=f or datetime.min,
+                        eliminado=(accion == "eliminar"),
+                    )
 
                     guia_to_cargos.setdefault(g, {})
                     prev = guia_to_cargos[g].get(key)
@@ -317,21 +423,17 @@ class FILSAuditoriaParser(BaseParser):
                         guia_to_cargos[g][key] = event
                     else:
                         # escoger evento más reciente (si fecha None, conservamos el existente)
-                        if (f or datetime.min) >= (prev.get("fecha") or datetime.min):
+                        if event.fecha_key >= prev.fecha_key:
                             guia_to_cargos[g][key] = event
 
                 # filtrar eliminados (última acción = eliminar)
-                for g in list(guia_to_cargos.keys()):
-                    filtered = {}
-                    for key, ev in guia_to_cargos[g].items():
-                        if str(ev.get("accion") or "").strip().lower() == "eliminar":
-                            continue
-                        filtered[key] = ev
-                    guia_to_cargos[g] = filtered
+                for g, cargos in guia_to_cargos.items():
+                    guia_to_cargos[g] = {key: ev for key, ev in cargos.items() if not ev.eliminado}
 
             # 3) Leer hoja Guía (eventos) y anexar contenedor + cargos
             ws = wb[SHEET_GUIA]
-            hr, headers = _find_header(ws)
+            top, rest = _scan_sheet(ws)
+            hr, headers = _find_header(ws, top_rows=top)
             idx = _build_index(headers)
 
             # requeridos para el flujo
@@ -342,20 +444,22 @@ class FILSAuditoriaParser(BaseParser):
             if idx.get("estado") is None:
                 raise ValueError("FILS/Guía: no se encontró columna 'Estado'.")
 
-            out: List[dict] = []
+            i_guia, i_estado, i_fecha = idx["guia"], idx["estado"], idx["fecha"]
+            i_ruta, i_tarifa = idx.get("ruta"), idx.get("monto_tarifa")
 
-            for row in ws.iter_rows(min_row=hr + 1, values_only=True):
-                row = list(row)
+            out: List[dict] = []
 
-                g = normalize_guia(_cell(row, idx["guia"]))
+            for row in chain(top[hr:], rest):
+                g = normalize_guia(_cell(row, i_guia))
                 if not g:
                     continue
+                g = intern(g)  # misma guía en varias filas/hojas -> un solo str
 
-                estado = str(_cell(row, idx["estado"]) or "").strip().upper()
-                fecha = _parse_fecha(_cell(row, idx["fecha"]))
-                ruta = str(_cell(row, idx.get("ruta")) or "").strip()
+                estado = _as_str_stripped(_cell(row, i_estado)).upper()
+                fecha = _parse_fecha(_cell(row, i_fecha))
+                ruta = _as_str_stripped(_cell(row, i_ruta))
 
-                monto_tarifa = parse_money(_cell(row, idx.get("monto_tarifa")))
+                monto_tarifa = parse_money(_cell(row, i_tarifa))
 
                 # contenedor: si no está en Guía, lo tomamos de Contenedor
                 cont = ""
@@ -368,11 +472,11 @@ class FILSAuditoriaParser(BaseParser):
                 for _, ev in cargos_map.items():
                     cargos_list.append(
                         {
-                            "cargo_id": ev.get("cargo_id") or "",
-                            "cargo": ev.get("cargo") or "",
-                            "tipo_cargo": ev.get("tipo_cargo") or "CARGO",
-                            "monto": ev.get("monto") or parse_money(0),
-                            "fecha": ev.get("fecha"),
+                            "cargo_id": ev.cargo_id,
+                            "cargo": ev.cargo,
+                            "tipo_cargo": ev.tipo_cargo or "CARGO",
+                            "monto": ev.monto or parse_money(0),
+                            "fecha": ev.fecha,
                         }
                     )
 
@@ -398,7 +502,3 @@ class FILSAuditoriaParser(BaseParser):
                 )
 
             return out
-
-        finally:
-            wb.close()
-
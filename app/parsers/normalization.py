@@ -1,11 +1,17 @@
 # app/parsers/normalization.py
 
-from typing import Dict, List, Optional
-import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 from app.utils.money import parse_money
 from app.utils.strings import upper_clean
 
+# Tabla de borrado para guía/contenedor: guiones + todo whitespace Unicode
+# (mismo conjunto que r"\s" en re), en un solo str.translate.
+_DROP_WS_DASH = str.maketrans(
+    "", "", "-" + "".join(chr(c) for c in range(0x3001) if chr(c).isspace())
+)
+
 
 def normalize_guia(value) -> str:
     """
@@ -17,10 +23,7 @@ def normalize_guia(value) -> str:
     """
     if value is None:
         return ""
-    s = str(value).strip()
-    s = re.sub(r"\s+", "", s)
-    s = s.replace("-", "")
-    return s
+    return str(value).translate(_DROP_WS_DASH)
 
 
 def normalize_contenedor(value) -> str:
@@ -33,10 +36,7 @@ def normalize_contenedor(value) -> str:
     """
     if value is None:
         return ""
-    s = str(value).strip().upper()
-    s = re.sub(r"\s+", "", s)
-    s = s.replace("-", "")
-    return s
+    return str(value).upper().translate(_DROP_WS_DASH)
 
 
 def normalize_amount(value):
@@ -60,29 +60,39 @@ def map_columns_by_synonyms(columns: List[str], synonyms: Dict[str, List[str]])
     - exact por upper_clean
     - contains por upper_clean (para casos tipo "Documento No.")
     """
-    rev = {upper_clean(c): c for c in columns}
-
-    mapped: Dict[str, Optional[str]] = {}
-    for canon, opts in synonyms.items():
-        found = None
+    frozen_synonyms = tuple((canon, tuple(opts)) for canon, opts in synonyms.items())
+    return dict(_map_columns_cached(tuple(columns), frozen_synonyms))
 
-        for o in opts:
-            o_up = upper_clean(o)
 
-            # exact
-            if o_up in rev:
-                found = rev[o_up]
-                break
-
-            # contains
-            for cu, orig in rev.items():
-                if o_up and o_up in cu:
-                    found = orig
-                    break
+@lru_cache(maxsize=64)
+def _map_columns_cached(columns: Tuple, synonyms: Tuple) -> Tuple:
+    """
+    Versión memoizada: la misma plantilla (mismas columnas) se sube una y otra vez.
+    Retorna tupla de pares (canonical, columna) para que el cache no sea mutable.
+    """
+    rev = {upper_clean(c): c for c in columns}
+    rev_items = list(rev.items())
 
-            if found:
-                break
+    return tuple(
+        (canon, _match_column([upper_clean(o) for o in opts], rev, rev_items))
+        for canon, opts in synonyms
+    )
 
-        mapped[canon] = found
 
-    return mapped
\ No newline at end of file
+def _match_column(opts_up: List[str], rev: Dict[str, str], rev_items: List[tuple]) -> Optional[str]:
+    """
+    Primer match para una canónica: por cada opción, exact y luego contains.
+    """
+    for o_up in opts_up:
+        # exact
+        if o_up in rev:
+            return rev[o_up]
+
+        # contains
+        if not o_up:
+            continue
+        for cu, orig in rev_items:
+            if o_up in cu:
+                return orig
+
+    return None
@@ -32,11 +32,12 @@ class ONEFacturacionParser(BaseParser):
     def sniff(self, path: str) -> Dict:
         meta = {"errors": [], "warnings": []}
         try:
-            xls = pd.ExcelFile(path)
-            meta["sheets"] = xls.sheet_names
+            # un solo open del xlsx: hojas + preview salen del mismo ExcelFile
+            with pd.ExcelFile(path) as xls:
+                meta["sheets"] = xls.sheet_names
 
-            sheet0 = xls.sheet_names[0]
-            df = pd.read_excel(path, sheet_name=sheet0, nrows=5)
+                sheet0 = xls.sheet_names[0]
+                df = xls.parse(sheet_name=sheet0, nrows=5)
 
             mapped = map_columns_by_synonyms(list(df.columns), self.SYNONYMS)
 
@@ -57,9 +58,9 @@ class ONEFacturacionParser(BaseParser):
         return meta
 
     def parse(self, path: str) -> List[dict]:
-        xls = pd.ExcelFile(path)
-        sheet0 = xls.sheet_names[0]
-        df = pd.read_excel(path, sheet_name=sheet0)
+        with pd.ExcelFile(path) as xls:
+            sheet0 = xls.sheet_names[0]
+            df = xls.parse(sheet_name=sheet0)
 
         mapped = map_columns_by_synonyms(list(df.columns), self.SYNONYMS)
 
@@ -3,7 +3,11 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import Dict, List, Iterable
+from itertools import islice
+from typing import Dict, List, Iterable, Iterator
+
+from sqlalchemy import delete, exists, insert, or_, select, text
+from sqlalchemy.orm import joinedload
 
 from app.extensions import db
 from app.models import (
@@ -11,9 +15,7 @@ from app.models import (
     ResultSummary, ResultContainer, ResultCharge, ResultException, ResultKPI
 )
 
-from app.parsers.fils_auditoria import FILSAuditoriaParser
-from app.parsers.cosco_facturacion import COSCOFacturacionParser
-from app.parsers.one_facturacion import ONEFacturacionParser
+from app.parsers import FILS_PARSER, NAVIERA_PARSERS
 
 from app.services.reconciliation import reconcile
 from app.services.kpis import compute_kpis
@@ -23,171 +25,191 @@ from app.utils.logging import get_logger
 
 logger = get_logger("job_runner")
 
-BATCH_SIZE = 1000
+BATCH_SIZE = 10000
+
+
+RESULT_MODELS = (ResultSummary, ResultContainer, ResultCharge, ResultException, ResultKPI)
 
 
 def _bulk_delete_job_results(job_id: int) -> None:
-    ResultSummary.query.filter_by(job_id=job_id).delete(synchronize_session=False)
-    ResultContainer.query.filter_by(job_id=job_id).delete(synchronize_session=False)
-    ResultCharge.query.filter_by(job_id=job_id).delete(synchronize_session=False)
-    ResultException.query.filter_by(job_id=job_id).delete(synchronize_session=False)
-    ResultKPI.query.filter_by(job_id=job_id).delete(synchronize_session=False)
-    db.session.commit()
+    # DELETE Core por tabla (sin sincronizar identity map); commit lo hace run_job.
+    # Job nuevo (primer run): un solo SELECT EXISTS por job_id en vez de 5 DELETE vacíos.
+    has_prev = db.session.execute(
+        select(or_(*(exists().where(m.job_id == job_id) for m in RESULT_MODELS)))
+    ).scalar()
+    if not has_prev:
+        return
+    for model in RESULT_MODELS:
+        db.session.execute(delete(model).where(model.job_id == job_id))
 
 
 def _bulk_insert(model, rows: List[dict]) -> None:
+    # sin commit: la persistencia completa del job va en una sola transacción
     if not rows:
         return
-    db.session.bulk_insert_mappings(model, rows)
-    db.session.commit()
+    db.session.execute(insert(model), rows)
+
+
+def _batch_sink(model, row_fn, job_id: int, n: int = BATCH_SIZE):
+    """
+    (add, flush) para ir insertando filas de detalle por lotes de n mientras
+    reconcile las produce, sin juntar la lista completa en memoria.
+    """
+    buf: List[dict] = []
+
+    def add(x) -> None:
+        buf.append(row_fn(job_id, x))
+        if len(buf) >= n:
+            flush()
+
+    def flush() -> None:
+        _bulk_insert(model, buf)
+        buf.clear()
+
+    return add, flush
+
+
+def _iter_batches(it: Iterable, n: int) -> Iterator[List]:
+    it = iter(it)
+    while batch := list(islice(it, n)):
+        yield batch
+
+
+def _summary_row(job_id: int, r) -> dict:
+    return {
+        "job_id": job_id,
+        "guia": r.guia,
+        "estado": r.estado,
+        "total_fils": r.total_fils,
+        "total_naviera": r.total_naviera,
+        "diferencia": r.diferencia,
+        "ok": r.ok,
+        "naviera": r.naviera,
+        "fuente_naviera": r.fuente_naviera,
+    }
+
+
+def _container_row(job_id: int, c: dict) -> dict:
+    # reconcile ya entrega el dict completo y tipado
+    return {"job_id": job_id, **c}
+
 
+def _charge_row(job_id: int, ch: dict) -> dict:
+    return {"job_id": job_id, **ch}
 
-def run_job(job_id: int, money_tolerance: float, output_folder: str) -> Dict:
-    job = Job.query.get(job_id)
+
+def _exception_row(job_id: int, e) -> dict:
+    return {
+        "job_id": job_id,
+        "tipo": e.tipo,
+        "guia": e.guia,
+        "contenedor": e.contenedor,
+        "detalle": e.detalle,
+        "severidad": e.severidad,
+        "naviera": e.naviera,
+    }
+
+
+def run_job(job_id: int, money_tolerance: float, output_folder: str, export: bool = True) -> Dict:
+    # job + archivos en un solo SELECT (job.files se usa enseguida para los paths)
+    job = db.session.get(Job, job_id, options=[joinedload(Job.files)])
     if not job:
         raise ValueError(f"Job no existe: {job_id}")
 
-    job.mark_running()
-    db.session.commit()
+    # el worker ya lo deja RUNNING (y commiteado) antes de llamar: no repetir el commit
+    if job.status != "RUNNING":
+        job.mark_running()
+        db.session.commit()
 
     try:
         # ----------------------------
         # obtener paths
         # ----------------------------
+        naviera_up = job.naviera.upper()
+        nav_parser = NAVIERA_PARSERS.get(naviera_up)
+        if nav_parser is None:
+            raise ValueError(f"Naviera no soportada: {job.naviera}")
+
         files = {f.file_type.upper(): f for f in job.files}
         if "FILS" not in files:
             raise ValueError("Falta archivo FILS en el Job.")
-        if job.naviera.upper() not in files:
+        if naviera_up not in files:
             raise ValueError(f"Falta archivo de facturación {job.naviera} en el Job.")
 
         fils_path = files["FILS"].stored_path
-        fact_path = files[job.naviera.upper()].stored_path
+        fact_path = files[naviera_up].stored_path
         tol = Decimal(str(money_tolerance))
 
         # ============================================================
         # 1) Parse FILS COMPLETO (Guía + Contenedor + Cargos Adicionales)
         #    -> aquí ya viene contenedor ligado por guía y cargos filtrados
         # ============================================================
-        fils_parser = FILSAuditoriaParser()
-        fils_rows: List[dict] = fils_parser.parse(fils_path)
+        fils_rows: List[dict] = FILS_PARSER.parse(fils_path)
 
         logger.info(f"FILS parsed rows={len(fils_rows)} (Guía + Contenedor + Cargos Adicionales)")
 
         # ============================================================
         # 2) Parse naviera (COSCO / ONE)
         # ============================================================
-        if job.naviera.upper() == "COSCO":
-            nav_parser = COSCOFacturacionParser()
-        else:
-            nav_parser = ONEFacturacionParser()
+        # streaming: reconcile consume el generador del parser una sola vez
+        nav_rows: Iterable[dict] = nav_parser.parse(fact_path)
+
+        # ============================================================
+        # 3) Persist results (una sola transacción: deletes + inserts + KPI + DONE)
+        # ============================================================
+        if db.session.get_bind().dialect.name == "postgresql":
+            # resultados recomputables desde los archivos: el commit de esta
+            # transacción no espera el flush del WAL (solo afecta a esta transacción)
+            db.session.execute(text("SET LOCAL synchronous_commit TO OFF"))
 
-        nav_rows: List[dict] = list(nav_parser.parse(fact_path))
-        logger.info(f"{job.naviera.upper()} parsed rows={len(nav_rows)}")
+        # antes de reconcile: el detalle se inserta por lotes mientras se genera
+        _bulk_delete_job_results(job_id)
+
+        add_cont, flush_cont = _batch_sink(ResultContainer, _container_row, job_id)
+        add_cargo, flush_cargo = _batch_sink(ResultCharge, _charge_row, job_id)
 
         # ============================================================
-        # 3) Reconcile
+        # 4) Reconcile (detalle contenedor / cargos directo a los sinks)
         # ============================================================
-        resumen, det_cont, det_cargos, excs = reconcile(
+        resumen, _, _, excs = reconcile(
             job.naviera,
             fils_rows=fils_rows,
             naviera_rows=nav_rows,
-            money_tolerance=tol
+            money_tolerance=tol,
+            on_cont=add_cont,
+            on_cargo=add_cargo,
         )
-
-        # ============================================================
-        # 4) Persist results
-        # ============================================================
-        _bulk_delete_job_results(job_id)
-
-        # Summary bulk
-        buf: List[dict] = []
-        for r in resumen:
-            buf.append({
-                "job_id": job_id,
-                "guia": r.guia,
-                "estado": r.estado,
-                "total_fils": r.total_fils,
-                "total_naviera": r.total_naviera,
-                "diferencia": r.diferencia,
-                "ok": r.ok,
-                "naviera": r.naviera,
-                "fuente_naviera": r.fuente_naviera,
-            })
-            if len(buf) >= BATCH_SIZE:
-                _bulk_insert(ResultSummary, buf)
-                buf.clear()
-        _bulk_insert(ResultSummary, buf)
-
-        # Containers bulk
-        buf = []
-        for c in det_cont:
-            buf.append({
-                "job_id": job_id,
-                "guia": str(c.get("guia", "")),
-                "contenedor": str(c.get("contenedor", "")),
-                "ruta": str(c.get("ruta", "")),
-                "flete": c.get("flete") or 0,
-                "extras": c.get("extras") or 0,
-                "total": c.get("total") or 0,
-                "naviera": str(c.get("naviera", "")),
-            })
-            if len(buf) >= BATCH_SIZE:
-                _bulk_insert(ResultContainer, buf)
-                buf.clear()
-        _bulk_insert(ResultContainer, buf)
-
-        # Charges bulk (incluye cargos adicionales del FILS)
-        buf = []
-        for ch in det_cargos:
-            buf.append({
-                "job_id": job_id,
-                "guia": str(ch.get("guia", "")),
-                "contenedor": str(ch.get("contenedor", "")),
-                "tipo_cargo": str(ch.get("tipo_cargo", "CARGO")),
-                "monto": ch.get("monto") or 0,
-                "origen": str(ch.get("origen", "FILS")),
-                "naviera": str(ch.get("naviera", "")),
-            })
-            if len(buf) >= BATCH_SIZE:
-                _bulk_insert(ResultCharge, buf)
-                buf.clear()
-        _bulk_insert(ResultCharge, buf)
-
-        # Exceptions bulk
-        buf = []
-        for e in excs:
-            buf.append({
-                "job_id": job_id,
-                "tipo": e.tipo,
-                "guia": e.guia,
-                "contenedor": e.contenedor,
-                "detalle": e.detalle,
-                "severidad": e.severidad,
-                "naviera": e.naviera,
-            })
-            if len(buf) >= BATCH_SIZE:
-                _bulk_insert(ResultException, buf)
-                buf.clear()
-        _bulk_insert(ResultException, buf)
-
-        # KPI
-        resumen_dicts = [{
-            "guia": r.guia,
-            "ok": r.ok,
-            "estado": r.estado,
-            "total_fils": str(r.total_fils),
-            "total_naviera": str(r.total_naviera),
-            "diferencia": str(r.diferencia),
-        } for r in resumen]
-
-        kpi = compute_kpis(job.naviera.upper(), resumen_dicts)
+        flush_cont()
+        flush_cargo()
+
+        # sin resumen no hay detalle: nada quedó insertado por los sinks
+        if not resumen and not excs:
+            # nada que persistir (ej. archivos sin guías): sin inserts, KPI ni export.
+            # rollback deshace los deletes de arriba: un re-run vacío no borra
+            # resultados previos. DONE_EMPTY lo distingue de un DONE con resultados.
+            db.session.rollback()
+            logger.warning(f"Job id={job_id} sin resultados de reconciliación; se omite persistencia y export")
+            job.mark_done_empty()
+            db.session.commit()
+            return {"job_id": job_id, "status": "DONE_EMPTY", "export_path": None, "kpi": None}
+
+        # Summary / Exceptions en lotes de BATCH_SIZE (containers/charges ya van)
+        for model, row_fn, src in (
+            (ResultSummary, _summary_row, resumen),
+            (ResultException, _exception_row, excs),
+        ):
+            for batch in _iter_batches((row_fn(job_id, x) for x in src), BATCH_SIZE):
+                _bulk_insert(model, batch)
+
+        # KPI (directo sobre los ReconRow, sin copia intermedia)
+        kpi = compute_kpis(naviera_up, resumen)
 
         db.session.add(ResultKPI(
             job_id=job_id,
             naviera=kpi["naviera"],
             total_guias=kpi["total_guias"],
             guias_ok=kpi["guias_ok"],
-            guias_diferencia=kpi["guias_diferencia"],
+            guias_diferencia=kpi["guias_con_diferencia"],
             guias_no_cerrada=kpi["guias_no_cerrada"],
             guias_solo_en_fils=kpi["guias_solo_en_fils"],
             guias_solo_en_naviera=kpi["guias_solo_en_naviera"],
@@ -195,11 +217,14 @@ def run_job(job_id: int, money_tolerance: float, output_folder: str) -> Dict:
             total_naviera=kpi["total_naviera"],
             diferencia_global=kpi["diferencia_global"],
         ))
-        db.session.commit()
 
-        # Export
-        export_path = export_job_to_excel(job_id=job_id, output_folder=output_folder)
+        # Export (misma sesión: autoflush deja ver los resultados aún sin commit)
+        # export=False: el cliente lee KPIs/resultados de la BD, sin XLSX
+        export_path = None
+        if export:
+            export_path = export_job_to_excel(job_id=job_id, output_folder=output_folder)
 
+        # resultados + KPI + DONE en un solo commit
         job.mark_done()
         db.session.commit()
 
@@ -211,6 +236,7 @@ def run_job(job_id: int, money_tolerance: float, output_folder: str) -> Dict:
         }
 
     except Exception as e:
+        db.session.rollback()
         job.mark_failed(e)
         db.session.commit()
         logger.exception(f"Job failed id={job_id}: {e}")
@@ -1,15 +1,15 @@
 # app/services/kpis.py
 
-from decimal import Decimal
 from typing import Iterable, Dict, Any
 
-from app.utils.money import parse_money
+from app.utils.money import parse_money_cents, cents_to_money
+from app.services.reconciliation import ReconRow, ESTADO_NO_CERRADA, ESTADO_SIN_FILS
 
 
-def compute_kpis(naviera: str, resumen_rows: Iterable[dict]) -> Dict[str, Any]:
+def compute_kpis(naviera: str, resumen_rows: Iterable[ReconRow]) -> Dict[str, Any]:
     """
-    resumen_rows: iterable de dict con keys:
-      guia, ok, estado, total_fils, total_naviera, diferencia
+    resumen_rows: iterable de ReconRow (salida de reconcile), se leen atributos:
+      ok, estado, total_fils, total_naviera
 
     NOTA:
     - En reconciliation.py los estados que realmente aparecen son:
@@ -29,17 +29,18 @@ def compute_kpis(naviera: str, resumen_rows: Iterable[dict]) -> Dict[str, Any]:
     guias_solo_en_naviera = 0
     guias_con_diferencia = 0  # ambos existen pero no cuadra
 
-    total_fils = Decimal("0")
-    total_naviera = Decimal("0")
+    # acumuladores en centavos (int); Decimal solo al final
+    total_fils = 0
+    total_naviera = 0
 
     for r in resumen_rows:
         total_guias += 1
 
-        ok = bool(r.get("ok"))
-        estado = str(r.get("estado", "")).upper().strip()
+        ok = bool(r.ok)
+        estado = r.estado  # reconcile ya lo emite normalizado (ESTADO_*)
 
-        tf = parse_money(r.get("total_fils"))
-        tn = parse_money(r.get("total_naviera"))
+        tf = parse_money_cents(r.total_fils)
+        tn = parse_money_cents(r.total_naviera)
 
         total_fils += tf
         total_naviera += tn
@@ -49,11 +50,11 @@ def compute_kpis(naviera: str, resumen_rows: Iterable[dict]) -> Dict[str, Any]:
         else:
             guias_no_ok += 1
 
-        if estado == "NO_CERRADA":
+        if estado == ESTADO_NO_CERRADA:
             guias_no_cerrada += 1
 
         # SOLO EN NAVIERA: reconciliation lo marca con estado SIN_FILS
-        if estado == "SIN_FILS":
+        if estado == ESTADO_SIN_FILS:
             guias_solo_en_naviera += 1
             # no lo cuentes como "diferencia" operativa (es missing)
             continue
@@ -81,9 +82,9 @@ def compute_kpis(naviera: str, resumen_rows: Iterable[dict]) -> Dict[str, Any]:
         "guias_solo_en_fils": guias_solo_en_fils,
         "guias_solo_en_naviera": guias_solo_en_naviera,
 
-        "total_fils": str(total_fils),
-        "total_naviera": str(total_naviera),
-        "diferencia_global": str(diferencia_global),
+        "total_fils": str(cents_to_money(total_fils)),
+        "total_naviera": str(cents_to_money(total_naviera)),
+        "diferencia_global": str(cents_to_money(diferencia_global)),
 
         "pct_ok": pct_ok,
     }
\ No newline at end of file
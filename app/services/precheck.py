@@ -1,12 +1,10 @@
 # app/services/precheck.py
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 
 from app.utils.logging import get_logger
-from app.parsers.fils_auditoria import FILSAuditoriaParser
-from app.parsers.cosco_facturacion import COSCOFacturacionParser
-from app.parsers.one_facturacion import ONEFacturacionParser
+from app.parsers import FILS_PARSER, NAVIERA_PARSERS
 
 logger = get_logger("precheck")
 
@@ -31,8 +29,7 @@ def run_precheck(naviera: str, fils_path: str, facturacion_path: str) -> Prechec
     meta: Dict[str, Any] = {"naviera": naviera}
 
     # FILS siempre
-    fils_parser = FILSAuditoriaParser()
-    fils_meta = fils_parser.sniff(fils_path)
+    fils_meta = FILS_PARSER.sniff(fils_path)
     meta["fils"] = fils_meta
 
     for msg in fils_meta.get("errors", []):
@@ -42,11 +39,8 @@ def run_precheck(naviera: str, fils_path: str, facturacion_path: str) -> Prechec
 
     # Naviera
     naviera_up = naviera.upper().strip()
-    if naviera_up == "COSCO":
-        parser = COSCOFacturacionParser()
-    elif naviera_up == "ONE":
-        parser = ONEFacturacionParser()
-    else:
+    parser = NAVIERA_PARSERS.get(naviera_up)
+    if parser is None:
         issues.append(PrecheckIssue("ERROR", f"Naviera no soportada: {naviera}"))
         return PrecheckReport(ok=False, naviera=naviera_up, issues=issues, meta=meta)
 
@@ -66,6 +60,13 @@ def run_precheck(naviera: str, fils_path: str, facturacion_path: str) -> Prechec
 
 
 def report_to_dict(report: PrecheckReport) -> dict:
-    d = asdict(report)
-    d["issues"] = [asdict(i) for i in report.issues]
-    return d
\ No newline at end of file
+    # armado explícito: asdict hace deepcopy recursivo de todo (incl. meta) y se recorría 2 veces
+    return {
+        "ok": report.ok,
+        "naviera": report.naviera,
+        "issues": [
+            {"level": i.level, "message": i.message, "context": i.context}
+            for i in report.issues
+        ],
+        "meta": report.meta,
+    }
\ No newline at end of file
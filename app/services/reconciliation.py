@@ -2,17 +2,24 @@
 
 from __future__ import annotations
 
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Iterable, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Iterable, Optional
 from decimal import Decimal
 
-from app.utils.money import parse_money
+from app.utils.money import parse_money, parse_money_cents, cents_to_money
 from app.utils.logging import get_logger
 
 logger = get_logger("reconciliation")
 
+# Estados de ReconRow: únicos valores que emite reconcile (ya en mayúscula)
+ESTADO_CERRADA = "CERRADA"
+ESTADO_NO_CERRADA = "NO_CERRADA"
+ESTADO_SIN_FILS = "SIN_FILS"
 
-@dataclass
+
+@dataclass(slots=True)
 class ReconRow:
     guia: str
     estado: str
@@ -24,7 +31,7 @@ class ReconRow:
     fuente_naviera: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ReconException:
     tipo: str
     guia: str = ""
@@ -34,8 +41,13 @@ class ReconException:
     naviera: str = ""
 
 
+_CONT_TRANS = str.maketrans("", "", "- ")
+
+
+@lru_cache(maxsize=4096)
 def _norm_contenedor(value: str) -> str:
-    return str(value or "").strip().upper().replace("-", "").replace(" ", "")
+    # mismos contenedores se repiten entre filas: cacheado
+    return str(value or "").strip().upper().translate(_CONT_TRANS)
 
 
 def _cargo_key_from_fils(c: dict) -> str:
@@ -71,62 +83,65 @@ def _cargo_key_from_naviera(r: dict) -> str:
     return str(name).strip().upper()
 
 
-def _sum_nav_total(rows: List[dict]) -> Decimal:
+# orden de preferencia de la llave de monto en filas naviera
+_NAV_AMT_KEYS = ("total_naviera", "total", "monto", "amount")
+_NAV_CARGO_AMT_KEYS = ("monto", "amount", "total_naviera", "total")
+
+
+def _first_not_none(r: dict, keys: Tuple[str, ...]):
+    # primer valor no-None (un 0 explícito cuenta como valor)
+    for k in keys:
+        v = r.get(k)
+        if v is not None:
+            return v
+    return None
+
+
+def _pick_key(x: dict):
+    # orden de "más reciente" para filas FILS
+    return x.get("fecha_cierre") or x.get("fecha") or 0
+
+
+def _sum_nav_total(rows: List[dict]) -> int:
     """
-    Total naviera por guía o por contenedor.
+    Total naviera por guía o por contenedor, en centavos.
     Soporta diferentes llaves del parser:
       total_naviera / total / monto / amount
     """
-    total = Decimal("0")
+    total = 0
     for r in rows:
-        v = (
-            r.get("total_naviera")
-            if r.get("total_naviera") is not None
-            else r.get("total")
-            if r.get("total") is not None
-            else r.get("monto")
-            if r.get("monto") is not None
-            else r.get("amount")
-        )
-        total += parse_money(v)
+        total += parse_money_cents(_first_not_none(r, _NAV_AMT_KEYS))
     return total
 
 
-def _build_nav_cargos(rows: List[dict]) -> Dict[str, Decimal]:
+def _build_nav_cargos(rows: List[dict]) -> Dict[str, int]:
     """
-    Construye mapa cargo_key -> monto_sum para NAVIERA.
+    Construye mapa cargo_key -> monto_sum (centavos) para NAVIERA.
     Si el archivo de ONE trae cargos adicionales como filas separadas, esto lo captura.
     Si trae solo un "Monto" total sin desglose, igual habrá 1 cargo genérico.
     """
-    cargos: Dict[str, Decimal] = {}
+    cargos: Dict[str, int] = defaultdict(int)
+    pm = parse_money_cents
     for r in rows:
-        key = _cargo_key_from_naviera(r)
-
-        v = (
-            r.get("monto")
-            if r.get("monto") is not None
-            else r.get("amount")
-            if r.get("amount") is not None
-            else r.get("total_naviera")
-            if r.get("total_naviera") is not None
-            else r.get("total")
-        )
-        cargos[key] = cargos.get(key, Decimal("0")) + parse_money(v)
-    return cargos
+        cargos[_cargo_key_from_naviera(r)] += pm(_first_not_none(r, _NAV_CARGO_AMT_KEYS))
+    return dict(cargos)
 
 
-def _build_fils_cargos(fils_r: dict) -> Dict[str, Decimal]:
+def _build_fils_cargos(fils_r: dict) -> Tuple[Dict[str, int], int]:
     """
-    Mapa cargo_key -> monto.
+    (mapa cargo_key -> monto, suma de todos los cargos), en centavos.
     En FILS ya filtramos por 'última actualización' y omitimos 'Eliminar',
     así que aquí solo sumamos/agrupamos por cargo.
     """
     cargos_list = fils_r.get("cargos") or []
-    cargos: Dict[str, Decimal] = {}
+    cargos: Dict[str, int] = defaultdict(int)
+    pm = parse_money_cents
+    total = 0
     for c in cargos_list:
-        key = _cargo_key_from_fils(c)
-        cargos[key] = cargos.get(key, Decimal("0")) + parse_money(c.get("monto"))
-    return cargos
+        v = pm(c.get("monto"))
+        cargos[_cargo_key_from_fils(c)] += v
+        total += v
+    return dict(cargos), total
 
 
 def reconcile(
@@ -134,6 +149,8 @@ def reconcile(
     fils_rows: Iterable[dict],
     naviera_rows: Iterable[dict],
     money_tolerance: Decimal,
+    on_cont: Optional[Callable[[dict], None]] = None,
+    on_cargo: Optional[Callable[[dict], None]] = None,
 ) -> Tuple[List[ReconRow], List[dict], List[dict], List[ReconException]]:
     """
     Reglas clave:
@@ -148,36 +165,44 @@ def reconcile(
     - Totales:
         total_fils = monto_total (Monto Tarifa) + SUM(cargos_naviera_en_fils)
         total_nav  = SUM(montos naviera rows del match)
+    - fils_rows y naviera_rows se recorren UNA sola vez (pueden ser generadores);
+      solo se guardan los índices por guía/contenedor.
+    - La aritmética de montos es en centavos (int); ReconRow y los detalles
+      reciben Decimal (2 decimales) vía cents_to_money.
+    - Los dicts de detalle_cont / detalle_cargos salen completos y tipados
+      (str / Decimal, mismas llaves que ResultContainer / ResultCharge).
+    - on_cont / on_cargo: si se pasan, cada dict de detalle se entrega ahí en
+      cuanto se arma (ej. insert por lotes) y la lista devuelta queda vacía.
     """
 
     naviera_up = naviera.upper()
+    # tolerancia a centavos con el mismo redondeo (half-up) que los montos
+    tol_cents = parse_money_cents(money_tolerance)
 
     # -----------------------------
     # 1) Indexar FILS por guía
     # -----------------------------
-    fils_by_guia: Dict[str, List[dict]] = {}
+    fils_by_guia: Dict[str, List[dict]] = defaultdict(list)
+    n_fils = 0
     for r in fils_rows:
+        n_fils += 1
         g = str(r.get("guia", "")).strip()
         if not g:
             continue
-        fils_by_guia.setdefault(g, []).append(r)
+        fils_by_guia[g].append(r)
 
     def pick_last_closed(rows: List[dict]) -> Tuple[str, dict]:
-        closed = [x for x in rows if str(x.get("estado", "")).upper().strip() == "CERRADA"]
-        if closed:
-            closed_sorted = sorted(
-                closed,
-                key=lambda x: x.get("fecha_cierre") or x.get("fecha") or 0,
-                reverse=True,
-            )
-            return "CERRADA", closed_sorted[0]
-
-        any_sorted = sorted(
-            rows,
-            key=lambda x: x.get("fecha_cierre") or x.get("fecha") or 0,
-            reverse=True,
-        )
-        return "NO_CERRADA", any_sorted[0]
+        # más reciente CERRADA sin materializar la sublista
+        # (con empate gana la primera, igual que sorted(reverse=True)[0])
+        best = k_best = None
+        for x in rows:
+            if str(x.get("estado", "")).upper().strip() == "CERRADA":
+                k = _pick_key(x)
+                if best is None or k > k_best:
+                    best, k_best = x, k
+        if best is not None:
+            return ESTADO_CERRADA, best
+        return ESTADO_NO_CERRADA, max(rows, key=_pick_key)
 
     fils_last: Dict[str, dict] = {}
     fils_estado: Dict[str, str] = {}
@@ -189,44 +214,63 @@ def reconcile(
     # -----------------------------
     # 2) Indexar FILS por contenedor (fallback para ONE sin guía)
     # -----------------------------
-    fils_by_cont: Dict[str, List[dict]] = {}
+    fils_by_cont: Dict[str, List[dict]] = defaultdict(list)
+    # normalizado una vez por fila (id(r), sin tocar los dicts del parser);
+    # se reutiliza en las excepciones de cargos
+    fils_cont_norm: Dict[int, str] = {}
     for g, r in fils_last.items():
-        cont = _norm_contenedor(r.get("contenedor", ""))
+        cont = fils_cont_norm[id(r)] = _norm_contenedor(r.get("contenedor", ""))
         if cont:
-            fils_by_cont.setdefault(cont, []).append(r)
+            fils_by_cont[cont].append(r)
 
     def pick_best_by_cont(rows: List[dict]) -> dict:
-        return sorted(
-            rows,
-            key=lambda x: x.get("fecha_cierre") or x.get("fecha") or 0,
-            reverse=True,
-        )[0]
+        return max(rows, key=_pick_key)
+
+    # flete/extras del detalle por fila FILS: la misma fila puede emitirse
+    # por guía y de nuevo por contenedor (paso 5), se parsea una vez
+    fils_parts: Dict[int, Tuple[Decimal, Decimal]] = {}
+
+    def flete_extras(r: dict) -> Tuple[Decimal, Decimal]:
+        parts = fils_parts.get(id(r))
+        if parts is None:
+            parts = fils_parts[id(r)] = (
+                parse_money(r.get("monto_flete") or 0),
+                parse_money(r.get("monto_extras") or 0),
+            )
+        return parts
 
     # -----------------------------
     # 3) Indexar NAVIERA
     # -----------------------------
-    nav_by_guia: Dict[str, List[dict]] = {}
-    nav_no_guia: List[dict] = []
+    nav_by_guia: Dict[str, List[dict]] = defaultdict(list)
+    # sin guía -> agrupadas por contenedor normalizado (match del paso 5)
+    nav_by_cont: Dict[str, List[dict]] = defaultdict(list)
 
+    n_nav = 0
     for r in naviera_rows:
+        n_nav += 1
         g = str(r.get("guia", "")).strip()
-        cont = _norm_contenedor(r.get("contenedor", ""))
         if g:
-            nav_by_guia.setdefault(g, []).append(r)
+            nav_by_guia[g].append(r)
         else:
+            # contenedor solo hace falta para el match sin guía
+            cont = _norm_contenedor(r.get("contenedor", ""))
             if cont:
-                r["_contenedor_norm"] = cont
-                nav_no_guia.append(r)
+                nav_by_cont[cont].append(r)
 
     # -----------------------------
     # 4) Universo inicial por GUÍA (match directo)
     # -----------------------------
-    all_guias = sorted(set(list(fils_last.keys()) + list(nav_by_guia.keys())))
+    # unión de vistas de llaves (sin listas intermedias); el orden de resumen
+    # sigue siendo por guía
+    all_guias = sorted(fils_last.keys() | nav_by_guia.keys())
 
     resumen: List[ReconRow] = []
     excepciones: List[ReconException] = []
     detalle_cont: List[dict] = []
     detalle_cargos: List[dict] = []
+    emit_cont = on_cont or detalle_cont.append
+    emit_cargo = on_cargo or detalle_cargos.append
 
     # helper para evitar buscar linealmente luego
     resumen_by_guia: Dict[str, ReconRow] = {}
@@ -234,6 +278,9 @@ def reconcile(
     for guia in all_guias:
         fils_r = fils_last.get(guia)
         nav_rs = nav_by_guia.get(guia)
+        estado = fils_estado.get(guia, ESTADO_NO_CERRADA)
+        first_nav = nav_rs[0] if nav_rs else {}
+        sheet0 = first_nav.get("sheet") or ""
 
         if not fils_r and nav_rs:
             total_nav = _sum_nav_total(nav_rs)
@@ -248,24 +295,23 @@ def reconcile(
             )
             row = ReconRow(
                 guia=guia,
-                estado="SIN_FILS",
-                total_fils=Decimal("0"),
-                total_naviera=total_nav,
-                diferencia=total_nav,
+                estado=ESTADO_SIN_FILS,
+                total_fils=cents_to_money(0),
+                total_naviera=cents_to_money(total_nav),
+                diferencia=cents_to_money(total_nav),
                 ok=False,
                 naviera=naviera_up,
-                fuente_naviera=(nav_rs[0].get("sheet") or ""),
+                fuente_naviera=sheet0,
             )
             resumen.append(row)
             resumen_by_guia[guia] = row
             continue
 
         if fils_r and not nav_rs:
-            base_fils = parse_money(fils_r.get("monto_total") or fils_r.get("monto_flete") or 0)
-            cargos_fils = _build_fils_cargos(fils_r)
-            total_fils = base_fils + sum(cargos_fils.values(), Decimal("0"))
+            base_fils = parse_money_cents(fils_r.get("monto_total") or fils_r.get("monto_flete") or 0)
+            cargos_fils, cargos_total = _build_fils_cargos(fils_r)
+            total_fils = base_fils + cargos_total
 
-            estado = fils_estado.get(guia, "NO_CERRADA")
             excepciones.append(
                 ReconException(
                     tipo="SOLO_EN_FILS",
@@ -275,7 +321,7 @@ def reconcile(
                     naviera=naviera_up,
                 )
             )
-            if estado == "NO_CERRADA":
+            if estado == ESTADO_NO_CERRADA:
                 excepciones.append(
                     ReconException(
                         tipo="NO_CERRADA",
@@ -289,35 +335,38 @@ def reconcile(
             row = ReconRow(
                 guia=guia,
                 estado=estado,
-                total_fils=total_fils,
-                total_naviera=Decimal("0"),
-                diferencia=total_fils,
+                total_fils=cents_to_money(total_fils),
+                total_naviera=cents_to_money(0),
+                diferencia=cents_to_money(total_fils),
                 ok=False,
                 naviera=naviera_up,
             )
             resumen.append(row)
             resumen_by_guia[guia] = row
 
+            fils_cont = fils_r.get("contenedor") or ""
+            flete, extras = flete_extras(fils_r)
+
             # detalle contenedor (aunque no haya naviera)
-            detalle_cont.append(
+            emit_cont(
                 {
                     "guia": guia,
-                    "contenedor": fils_r.get("contenedor") or "",
+                    "contenedor": fils_cont,
                     "ruta": fils_r.get("ruta") or "",
-                    "flete": str(parse_money(fils_r.get("monto_flete") or 0)),
-                    "extras": str(parse_money(fils_r.get("monto_extras") or 0)),
-                    "total": str(total_fils),
+                    "flete": flete,
+                    "extras": extras,
+                    "total": cents_to_money(total_fils),
                     "naviera": naviera_up,
                 }
             )
             # cargos FILS
             for k, amt in cargos_fils.items():
-                detalle_cargos.append(
+                emit_cargo(
                     {
                         "guia": guia,
-                        "contenedor": fils_r.get("contenedor") or "",
+                        "contenedor": fils_cont,
                         "tipo_cargo": k,
-                        "monto": str(amt),
+                        "monto": cents_to_money(amt),
                         "origen": "FILS",
                         "naviera": naviera_up,
                     }
@@ -327,19 +376,18 @@ def reconcile(
         # ambos existen por guía
         assert fils_r is not None and nav_rs is not None
 
-        base_fils = parse_money(fils_r.get("monto_total") or 0)
+        base_fils = parse_money_cents(fils_r.get("monto_total") or 0)
         if base_fils == 0:
-            base_fils = parse_money(fils_r.get("monto_flete") or 0) + parse_money(fils_r.get("monto_extras") or 0)
+            base_fils = parse_money_cents(fils_r.get("monto_flete") or 0) + parse_money_cents(fils_r.get("monto_extras") or 0)
 
-        cargos_fils = _build_fils_cargos(fils_r)
-        total_fils = base_fils + sum(cargos_fils.values(), Decimal("0"))
+        cargos_fils, cargos_total = _build_fils_cargos(fils_r)
+        total_fils = base_fils + cargos_total
 
         total_nav = _sum_nav_total(nav_rs)
         diff = total_fils - total_nav
-        ok = abs(diff) <= money_tolerance
+        ok = abs(diff) <= tol_cents
 
-        estado = fils_estado.get(guia, "NO_CERRADA")
-        if estado == "NO_CERRADA":
+        if estado == ESTADO_NO_CERRADA:
             excepciones.append(
                 ReconException(
                     tipo="NO_CERRADA",
@@ -355,28 +403,36 @@ def reconcile(
                 ReconException(
                     tipo="DIFERENCIA",
                     guia=guia,
-                    detalle=f"Diferencia detectada. FILS={total_fils} vs NAVIERA={total_nav}.",
+                    detalle=f"Diferencia detectada. FILS={cents_to_money(total_fils)} vs NAVIERA={cents_to_money(total_nav)}.",
                     severidad="ERROR",
                     naviera=naviera_up,
                 )
             )
 
+        # contenedor crudo (detalles) y normalizado (excepciones), una vez por guía
+        fils_cont = fils_r.get("contenedor") or ""
+        cont_norm = fils_cont_norm[id(fils_r)]
+
         # Comparación de cargos (cuando sea posible)
         nav_cargos = _build_nav_cargos(nav_rs)
         if cargos_fils:
             # Si FILS tiene cargos, intentamos comparar el desglose
-            union_keys = set(cargos_fils.keys()) | set(nav_cargos.keys())
-            for ck in sorted(union_keys):
-                a = cargos_fils.get(ck, Decimal("0"))
-                b = nav_cargos.get(ck, Decimal("0"))
+            # orden alfabético de cargo: las excepciones CARGO_* salen estables
+            # sin importar el orden de las filas de entrada
+            for ck in sorted(cargos_fils.keys() | nav_cargos.keys()):
+                a = cargos_fils.get(ck, 0)
+                b = nav_cargos.get(ck, 0)
+                if a == b:
+                    # cuadra exacto (incl. 0 vs 0): ninguna excepción aplica
+                    continue
                 d = a - b
-                if abs(d) > money_tolerance:
+                if abs(d) > tol_cents:
                     excepciones.append(
                         ReconException(
                             tipo="CARGO_DIFERENCIA",
                             guia=guia,
-                            contenedor=_norm_contenedor(fils_r.get("contenedor", "")),
-                            detalle=f"Cargo '{ck}' difiere. FILS={a} vs NAVIERA={b}.",
+                            contenedor=cont_norm,
+                            detalle=f"Cargo '{ck}' difiere. FILS={cents_to_money(a)} vs NAVIERA={cents_to_money(b)}.",
                             severidad="ERROR",
                             naviera=naviera_up,
                         )
@@ -386,7 +442,7 @@ def reconcile(
                         ReconException(
                             tipo="CARGO_SOLO_NAVIERA",
                             guia=guia,
-                            contenedor=_norm_contenedor(fils_r.get("contenedor", "")),
+                            contenedor=cont_norm,
                             detalle=f"Cargo '{ck}' existe en NAVIERA pero no en FILS.",
                             severidad="WARN",
                             naviera=naviera_up,
@@ -397,7 +453,7 @@ def reconcile(
                         ReconException(
                             tipo="CARGO_SOLO_FILS",
                             guia=guia,
-                            contenedor=_norm_contenedor(fils_r.get("contenedor", "")),
+                            contenedor=cont_norm,
                             detalle=f"Cargo '{ck}' existe en FILS pero no en NAVIERA.",
                             severidad="WARN",
                             naviera=naviera_up,
@@ -407,49 +463,50 @@ def reconcile(
         row = ReconRow(
             guia=guia,
             estado=estado,
-            total_fils=total_fils,
-            total_naviera=total_nav,
-            diferencia=diff,
+            total_fils=cents_to_money(total_fils),
+            total_naviera=cents_to_money(total_nav),
+            diferencia=cents_to_money(diff),
             ok=ok,
             naviera=naviera_up,
-            fuente_naviera=(nav_rs[0].get("sheet") or ""),
+            fuente_naviera=sheet0,
         )
         resumen.append(row)
         resumen_by_guia[guia] = row
 
-        detalle_cont.append(
+        flete, extras = flete_extras(fils_r)
+        emit_cont(
             {
                 "guia": guia,
-                "contenedor": (fils_r.get("contenedor") or ""),
-                "ruta": (fils_r.get("ruta") or (nav_rs[0].get("ruta") if nav_rs else "")),
-                "flete": str(parse_money(fils_r.get("monto_flete") or 0)),
-                "extras": str(parse_money(fils_r.get("monto_extras") or 0)),
-                "total": str(total_fils),
+                "contenedor": fils_cont,
+                "ruta": (fils_r.get("ruta") or first_nav.get("ruta") or ""),
+                "flete": flete,
+                "extras": extras,
+                "total": cents_to_money(total_fils),
                 "naviera": naviera_up,
             }
         )
 
         # cargos detalle (FILS)
         for ck, amt in cargos_fils.items():
-            detalle_cargos.append(
+            emit_cargo(
                 {
                     "guia": guia,
-                    "contenedor": fils_r.get("contenedor") or "",
+                    "contenedor": fils_cont,
                     "tipo_cargo": ck,
-                    "monto": str(amt),
+                    "monto": cents_to_money(amt),
                     "origen": "FILS",
                     "naviera": naviera_up,
                 }
             )
 
         # cargos detalle (NAVIERA) - útil para export/auditoría
-        for ck, amt in _build_nav_cargos(nav_rs).items():
-            detalle_cargos.append(
+        for ck, amt in nav_cargos.items():
+            emit_cargo(
                 {
                     "guia": guia,
-                    "contenedor": fils_r.get("contenedor") or "",
+                    "contenedor": fils_cont,
                     "tipo_cargo": ck,
-                    "monto": str(amt),
+                    "monto": cents_to_money(amt),
                     "origen": "NAVIERA",
                     "naviera": naviera_up,
                 }
@@ -458,14 +515,10 @@ def reconcile(
     # -----------------------------
     # 5) Segundo pase: NAVIERA sin guía -> match por contenedor
     # -----------------------------
-    nav_by_cont: Dict[str, List[dict]] = {}
-    for r in nav_no_guia:
-        cont = r.get("_contenedor_norm") or ""
-        if cont:
-            nav_by_cont.setdefault(cont, []).append(r)
-
     for cont, nav_rs in nav_by_cont.items():
         fils_candidates = fils_by_cont.get(cont)
+        first_nav = nav_rs[0]
+        sheet0 = first_nav.get("sheet") or ""
 
         if not fils_candidates:
             total_nav = _sum_nav_total(nav_rs)
@@ -482,56 +535,59 @@ def reconcile(
             resumen.append(
                 ReconRow(
                     guia=f"(SIN_GUIA){cont}",
-                    estado="SIN_FILS",
-                    total_fils=Decimal("0"),
-                    total_naviera=total_nav,
-                    diferencia=total_nav,
+                    estado=ESTADO_SIN_FILS,
+                    total_fils=cents_to_money(0),
+                    total_naviera=cents_to_money(total_nav),
+                    diferencia=cents_to_money(total_nav),
                     ok=False,
                     naviera=naviera_up,
-                    fuente_naviera=(nav_rs[0].get("sheet") or ""),
+                    fuente_naviera=sheet0,
                 )
             )
             continue
 
         fils_r = pick_best_by_cont(fils_candidates)
         guia = str(fils_r.get("guia", "")).strip()
-        estado = fils_estado.get(guia, "NO_CERRADA")
+        estado = fils_estado.get(guia, ESTADO_NO_CERRADA)
 
-        base_fils = parse_money(fils_r.get("monto_total") or 0)
+        base_fils = parse_money_cents(fils_r.get("monto_total") or 0)
         if base_fils == 0:
-            base_fils = parse_money(fils_r.get("monto_flete") or 0) + parse_money(fils_r.get("monto_extras") or 0)
+            base_fils = parse_money_cents(fils_r.get("monto_flete") or 0) + parse_money_cents(fils_r.get("monto_extras") or 0)
 
-        cargos_fils = _build_fils_cargos(fils_r)
-        total_fils = base_fils + sum(cargos_fils.values(), Decimal("0"))
+        cargos_fils, cargos_total = _build_fils_cargos(fils_r)
+        total_fils = base_fils + cargos_total
 
         total_nav = _sum_nav_total(nav_rs)
 
         # Si la guía ya estaba por match directo, acumulamos naviera aquí (porque son filas extra sin guía)
         existing = resumen_by_guia.get(guia)
         if existing:
-            existing.total_naviera = existing.total_naviera + total_nav
-            existing.diferencia = existing.total_fils - existing.total_naviera
-            existing.ok = abs(existing.diferencia) <= money_tolerance
-            existing.fuente_naviera = existing.fuente_naviera or (nav_rs[0].get("sheet") or "")
-            diff = existing.diferencia
-            ok = existing.ok
+            # los Decimal de ReconRow tienen 2 decimales: volver a centavos es exacto
+            ex_fils = parse_money_cents(existing.total_fils)
+            ex_nav = parse_money_cents(existing.total_naviera) + total_nav
+            diff = ex_fils - ex_nav
+            ok = abs(diff) <= tol_cents
+            existing.total_naviera = cents_to_money(ex_nav)
+            existing.diferencia = cents_to_money(diff)
+            existing.ok = ok
+            existing.fuente_naviera = existing.fuente_naviera or sheet0
         else:
             diff = total_fils - total_nav
-            ok = abs(diff) <= money_tolerance
+            ok = abs(diff) <= tol_cents
             row = ReconRow(
                 guia=guia,
                 estado=estado,
-                total_fils=total_fils,
-                total_naviera=total_nav,
-                diferencia=diff,
+                total_fils=cents_to_money(total_fils),
+                total_naviera=cents_to_money(total_nav),
+                diferencia=cents_to_money(diff),
                 ok=ok,
                 naviera=naviera_up,
-                fuente_naviera=(nav_rs[0].get("sheet") or ""),
+                fuente_naviera=sheet0,
             )
             resumen.append(row)
             resumen_by_guia[guia] = row
 
-        if estado == "NO_CERRADA":
+        if estado == ESTADO_NO_CERRADA:
             excepciones.append(
                 ReconException(
                     tipo="NO_CERRADA",
@@ -549,39 +605,41 @@ def reconcile(
                     tipo="DIFERENCIA",
                     guia=guia,
                     contenedor=cont,
-                    detalle=f"(Match por contenedor) Diferencia: FILS={total_fils} vs NAVIERA={total_nav}.",
+                    detalle=f"(Match por contenedor) Diferencia: FILS={cents_to_money(total_fils)} vs NAVIERA={cents_to_money(total_nav)}.",
                     severidad="ERROR",
                     naviera=naviera_up,
                 )
             )
 
         # Detalle contenedor (registramos el contenedor real del match)
-        detalle_cont.append(
+        flete, extras = flete_extras(fils_r)
+        emit_cont(
             {
                 "guia": guia,
                 "contenedor": cont,
-                "ruta": (fils_r.get("ruta") or (nav_rs[0].get("ruta") if nav_rs else "")),
-                "flete": str(parse_money(fils_r.get("monto_flete") or 0)),
-                "extras": str(parse_money(fils_r.get("monto_extras") or 0)),
-                "total": str(total_fils),
+                "ruta": (fils_r.get("ruta") or first_nav.get("ruta") or ""),
+                "flete": flete,
+                "extras": extras,
+                "total": cents_to_money(total_fils),
                 "naviera": naviera_up,
             }
         )
 
         # Detalle cargos NAVIERA para estas filas sin guía
         for ck, amt in _build_nav_cargos(nav_rs).items():
-            detalle_cargos.append(
+            emit_cargo(
                 {
                     "guia": guia,
                     "contenedor": cont,
                     "tipo_cargo": ck,
-                    "monto": str(amt),
+                    "monto": cents_to_money(amt),
                     "origen": "NAVIERA",
                     "naviera": naviera_up,
                 }
             )
 
     logger.info(
-        f"Reconciliation done naviera={naviera_up} resumen={len(resumen)} excepciones={len(excepciones)}"
+        f"Reconciliation done naviera={naviera_up} fils_rows={n_fils} naviera_rows={n_nav} "
+        f"resumen={len(resumen)} excepciones={len(excepciones)}"
     )
     return resumen, detalle_cont, detalle_cargos, excepciones
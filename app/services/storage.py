@@ -13,15 +13,10 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
-    h = hashlib.sha256()
+def sha256_file(path: str) -> str:
+    # lectura + hash dentro de hashlib (buffer reutilizado, sin bytes por chunk)
     with open(path, "rb") as f:
-        while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
-                break
-            h.update(chunk)
-    return h.hexdigest()
+        return hashlib.file_digest(f, "sha256").hexdigest()
 
 
 def save_uploaded_file(file_storage, base_upload_folder: str, job_id: int, file_type: str) -> dict:
@@ -2,6 +2,36 @@
 
 from datetime import datetime, date
 
+# formatos comunes (podemos ampliar según tus excels reales)
+_SLASH_FORMATS = ("%d/%m/%Y %H:%M", "%d/%m/%Y")
+_DASH_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d-%m-%Y %H:%M",
+    "%d-%m-%Y",
+)
+
+
+def _is_iso(s: str) -> bool:
+    """
+    True si s es exactamente YYYY-MM-DD o YYYY-MM-DD HH:MM:SS en dígitos ASCII
+    (mismo conjunto que aceptan los dos primeros formatos con strptime).
+    """
+    n = len(s)
+    if n not in (10, 19) or not s.isascii():
+        return False
+    if s[4] != "-" or s[7] != "-":
+        return False
+    if not (s[:4].isdigit() and s[5:7].isdigit() and s[8:10].isdigit()):
+        return False
+    if n == 10:
+        return True
+    return (
+        s[10] == " " and s[13] == ":" and s[16] == ":"
+        and s[11:13].isdigit() and s[14:16].isdigit() and s[17:19].isdigit()
+    )
+
+
 def parse_datetime(value):
     """
     Convierte celdas Excel/strings a datetime cuando sea posible.
@@ -20,15 +50,17 @@ def parse_datetime(value):
     if not s:
         return None
 
-    # formatos comunes (podemos ampliar según tus excels reales)
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d",
-        "%d/%m/%Y %H:%M",
-        "%d/%m/%Y",
-        "%d-%m-%Y %H:%M",
-        "%d-%m-%Y",
-    ]
+    if "/" in s:
+        # solo los formatos con "/" pueden calzar
+        formats = _SLASH_FORMATS
+    else:
+        # ISO exacto (YYYY-MM-DD[ HH:MM:SS]): fromisoformat, mucho más rápido
+        if _is_iso(s):
+            try:
+                return datetime.fromisoformat(s)
+            except ValueError:
+                pass  # fecha/hora fuera de rango: strptime decide (-> None)
+        formats = _DASH_FORMATS
 
     for fmt in formats:
         try:
@@ -36,4 +68,4 @@ def parse_datetime(value):
         except ValueError:
             continue
 
-    return None
\ No newline at end of file
+    return None
@@ -1,11 +1,15 @@
 # app/utils/logging.py
 
 import logging
+import os
 
 def get_logger(name="auditoria"):
     logger = logging.getLogger(name)
     if not logger.handlers:
-        logger.setLevel(logging.INFO)
+        # LOG_LEVEL=DEBUG/WARNING/... para ajustar el ruido en Render
+        # un valor inválido (p.ej. "verbose") cae a INFO en vez de romper el arranque
+        level = logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+        logger.setLevel(level if isinstance(level, int) else logging.INFO)
         handler = logging.StreamHandler()
         formatter = logging.Formatter(
             "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
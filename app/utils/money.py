@@ -1,7 +1,13 @@
 # app/utils/money.py
 
 import re
-from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+_DEC0 = Decimal("0")  # inmutable: se comparte
+
+# todo lo que no sea dígito, separador o signo (moneda, letras, espacios)
+_MONEY_JUNK_RE = re.compile(r"[^\d,.\-]")
 
 
 def parse_money(value) -> Decimal:
@@ -13,9 +19,15 @@ def parse_money(value) -> Decimal:
       - maneja floats/ints/Decimal y strings sucias
     """
     if value is None:
-        return Decimal("0")
+        return _DEC0
 
-    # Números directos
+    # Números directos: tipos exactos primero (celdas openpyxl)
+    t = type(value)
+    if t is Decimal:
+        return value
+    if t is int:
+        return Decimal(value)
+    # subclases (numpy.float64 de pandas, bool) por el camino general
     if isinstance(value, Decimal):
         return value
     if isinstance(value, (int, float)):
@@ -23,11 +35,19 @@ def parse_money(value) -> Decimal:
             # str(float) suele venir bien (ej "124797.0"), pero puede venir "1e+06"
             return Decimal(str(value))
         except InvalidOperation:
-            return Decimal("0")
+            return _DEC0
+
+    return _parse_money_str(str(value).strip())
 
-    s = str(value).strip()
+
+@lru_cache(maxsize=8192)
+def _parse_money_str(s: str) -> Decimal:
+    """
+    Camino string de parse_money. Montos/cargos se repiten mucho entre filas:
+    cacheado por el string ya stripeado (Decimal es inmutable).
+    """
     if s == "" or s.lower() in ("nan", "none"):
-        return Decimal("0")
+        return _DEC0
 
     # Detectar negativos con paréntesis
     negative = False
@@ -41,11 +61,11 @@ def parse_money(value) -> Decimal:
         s = s[:-1].strip()
 
     # Quitar moneda/letras, dejar dígitos, separadores y signo -
-    s = re.sub(r"[^\d,.\-]", "", s)
+    s = _MONEY_JUNK_RE.sub("", s)
 
     # Si queda solo "-" o vacío
     if s in ("", "-"):
-        return Decimal("0")
+        return _DEC0
 
     # Normalización de separadores:
     # 1) "1.234,56" -> miles "." decimal ","
@@ -73,8 +93,29 @@ def parse_money(value) -> Decimal:
         val = Decimal(s)
         return -val if negative else val
     except InvalidOperation:
-        return Decimal("0")
+        return _DEC0
 
 
 def money_diff(a, b) -> Decimal:
-    return parse_money(a) - parse_money(b)
\ No newline at end of file
+    return parse_money(a) - parse_money(b)
+
+
+def parse_money_cents(value) -> int:
+    """
+    Igual que parse_money pero retorna centavos como int (redondeo half-up).
+    Pensado para acumular/comparar montos sin aritmética Decimal por fila.
+    NaN/Infinity (ej. celdas vacías de pandas) -> 0.
+    """
+    if type(value) is int:
+        return value * 100
+    d = parse_money(value)
+    if not d.is_finite():
+        return 0
+    return int(d.scaleb(2).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def cents_to_money(cents: int) -> Decimal:
+    """
+    Centavos (int) -> Decimal con 2 decimales, para persistir/mostrar.
+    """
+    return Decimal(cents).scaleb(-2)
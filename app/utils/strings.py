@@ -2,6 +2,11 @@
 
 import re
 import unicodedata
+from functools import lru_cache
+
+# símbolos que se descartan al normalizar (¿?°.)
+_DROP_SYMBOLS = str.maketrans("", "", "°¿?.")
+_WS_RE = re.compile(r"\s+")
 
 
 def norm_text(value: str) -> str:
@@ -18,38 +23,47 @@ def norm_text(value: str) -> str:
 
     s = str(value).strip()
 
-    # quitar tildes: Número -> Numero
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
+    # quitar tildes: Número -> Numero (ASCII puro no tiene nada que quitar)
+    if not s.isascii():
+        s = unicodedata.normalize("NFD", s)
+        s = "".join(c for c in s if unicodedata.category(c) != "Mn")
 
-    # reemplazar símbolos comunes
-    s = s.replace("°", "")
-    s = s.replace("¿", "")
-    s = s.replace("?", "")
-    s = s.replace(".", "")
+    # quitar símbolos comunes en una sola pasada
+    s = s.translate(_DROP_SYMBOLS)
 
     # colapsar espacios
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
 
     return s
 
 
+@lru_cache(maxsize=4096, typed=True)
 def upper_clean(value: str) -> str:
     """
     Texto normalizado + UPPER
+
+    Memoizado: los headers y sinónimos se repiten entre hojas y archivos.
     """
     return norm_text(value).upper()
 
 
+_ROUTE_TOKENS = ("SJO", "CAL", "LIO")
+
+
 def find_route_tokens(*fields) -> set:
     """
     Busca tokens SJO / CAL / LIO en varios campos de texto.
+    Campo por campo (un token no cruza campos); corta al encontrar los tres.
     """
     tokens = set()
-    joined = " ".join([upper_clean(f) for f in fields if f is not None])
-
-    for t in ("SJO", "CAL", "LIO"):
-        if t in joined:
-            tokens.add(t)
+    for f in fields:
+        if f is None:
+            continue
+        u = upper_clean(f)
+        for t in _ROUTE_TOKENS:
+            if t in u:
+                tokens.add(t)
+        if len(tokens) == len(_ROUTE_TOKENS):
+            break
 
-    return tokens
\ No newline at end of file
+    return tokens
@@ -2,13 +2,19 @@
 
 import os
 import time
+import select
 import signal
+from typing import Optional
+
 from sqlalchemy import text
 
 from app import create_app
 from app.extensions import db
 from app.models import Job
 from app.services.job_runner import run_job
+from app.utils.logging import get_logger
+
+logger = get_logger("worker")
 
 
 STOP = False
@@ -17,80 +23,146 @@ STOP = False
 def _handle_stop(signum, frame):
     global STOP
     STOP = True
-    print(f"🛑 Señal recibida ({signum}). Cerrando worker con gracia...")
+    logger.info(f"🛑 Señal recibida ({signum}). Cerrando worker con gracia...")
+
+
+def _make_wakeup_fd() -> int:
+    """
+    Pipe para signal.set_wakeup_fd: cada señal escribe un byte en el extremo
+    de escritura; el de lectura se usa en _sleep para cortar la espera.
+    """
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    os.set_blocking(w, False)
+    signal.set_wakeup_fd(w)
+    return r
+
 
+def _sleep(seconds: float, wake_fd: int) -> None:
+    """
+    Espera hasta `seconds`, pero vuelve de inmediato si llega una señal
+    (SIGTERM en redeploy no espera el backoff completo).
+    """
+    ready, _, _ = select.select([wake_fd], [], [], seconds)
+    if ready:
+        try:
+            os.read(wake_fd, 4096)  # drenar
+        except BlockingIOError:
+            pass
 
-def _set_search_path():
-    # Blindaje para que SIEMPRE use auditoria schema en esta conexión
-    db.session.execute(text("SET search_path TO auditoria, public;"))
+
+def _fetch_next_job() -> Optional[int]:
+    """
+    Toma el job encolado más viejo y lo deja RUNNING (commiteado).
+    Retorna su id, o None si la cola está vacía.
+
+    Job.claim_next: un solo UPDATE ... RETURNING con FOR UPDATE SKIP LOCKED
+    en el subselect; si otro worker ya tiene bloqueado un job, se salta al
+    siguiente. Así se pueden correr varios workers a la vez sin procesar dos
+    veces el mismo job.
+
+    Uno por vuelta (no por lotes): no hay lease/started_at que recupere jobs
+    RUNNING huérfanos, así que si el proceso muere (SIGKILL, OOM, redeploy)
+    solo queda colgado el job que estaba corriendo, no una tanda reservada.
+    """
+    ids = Job.claim_next(1)
+    # siempre: sin jobs tampoco debe quedar la transacción abierta durante el sleep
+    db.session.commit()
+    return ids[0] if ids else None
 
 
-def _fetch_next_job() -> Job | None:
+def _requeue(job_ids: list[int]) -> None:
     """
-    Toma el siguiente job encolado.
-    Orden: más viejo primero.
+    Devuelve a QUEUED jobs tomados que no se alcanzaron a correr
+    (ej. SIGTERM entre el claim y el arranque), para que otro worker los tome.
     """
-    _set_search_path()
-    return (
+    if not job_ids:
+        return
+    (
         Job.query
-        .filter(Job.status == "QUEUED")
-        .order_by(Job.id.asc())
-        .first()
+        .filter(Job.id.in_(job_ids), Job.status == "RUNNING")
+        .update({Job.status: "QUEUED"}, synchronize_session=False)
     )
+    db.session.commit()
+    logger.warning(f"↩️ Jobs devueltos a la cola: {job_ids}")
+
+
+def _process_job(job_id: int, money_tolerance: float, output_folder: str) -> None:
+    logger.info(f"🧾 Job tomado: id={job_id} (RUNNING)")
+
+    t0 = time.time()
+
+    # Ejecutar
+    result = run_job(
+        job_id=job_id,
+        money_tolerance=money_tolerance,
+        output_folder=output_folder,
+    )
+
+    elapsed = time.time() - t0
+    status = (result or {}).get("status", "UNKNOWN")
+
+    logger.info(f"✅ Job {job_id} terminó. status={status} elapsed={elapsed:.1f}s")
+
+    # run_job ya marca DONE o FAILED internamente,
+    # pero por seguridad, si viniera algo raro:
+    job = db.session.get(Job, job_id)
+    if status == "FAILED" and job and job.status != "FAILED":
+        job.mark_failed((result or {}).get("error", "Job falló sin detalle."))
+        db.session.commit()
 
 
 def main():
     # Señales típicas en Render al detener/redeploy
     signal.signal(signal.SIGTERM, _handle_stop)
     signal.signal(signal.SIGINT, _handle_stop)
+    wake_fd = _make_wakeup_fd()
 
-    print("🚀 Worker iniciado. Esperando jobs...")
+    logger.info("🚀 Worker iniciado. Esperando jobs...")
 
     app = create_app()
 
     # Configs (puedes cambiarlos por env vars en Render)
-    poll_seconds = int(os.getenv("WORKER_POLL_SECONDS", "3"))
+    # espera entre polls vacíos: backoff exponencial min -> max, vuelve a min
+    # al tomar un job (rápido con cola activa, pocas consultas con cola ociosa)
+    min_sleep = float(os.getenv("WORKER_MIN_SLEEP", "0.2"))
+    max_sleep = float(os.getenv("WORKER_MAX_SLEEP", "30"))
     money_tolerance = float(os.getenv("MONEY_TOLERANCE", "1.0"))
     output_folder = os.getenv("OUTPUT_FOLDER", "outputs")
 
     with app.app_context():
-        print("✅ App context OK. Entrando al loop infinito.")
+        logger.info("✅ App context OK. Entrando al loop infinito.")
+
+        # pre-calentar el pool: conexión (TLS + auth + search_path) antes del
+        # primer job; si la BD aún no responde, el loop reintenta igual
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo pre-calentar la conexión: {type(e).__name__}: {e}")
+
+        idle_sleep = min_sleep
 
         while not STOP:
             try:
-                job = _fetch_next_job()
+                job_id = _fetch_next_job()
 
-                if not job:
-                    time.sleep(poll_seconds)
+                if job_id is None:
+                    _sleep(idle_sleep, wake_fd)
+                    idle_sleep = min(idle_sleep * 2, max_sleep)
                     continue
 
-                print(f"🧾 Job encontrado: id={job.id}. Marcando RUNNING...")
-                job.mark_running()
-                job.error_message = None
-                db.session.commit()
-
-                t0 = time.time()
-
-                # Ejecutar
-                result = run_job(
-                    job_id=job.id,
-                    money_tolerance=money_tolerance,
-                    output_folder=output_folder,
-                )
-
-                elapsed = time.time() - t0
-                status = (result or {}).get("status", "UNKNOWN")
+                idle_sleep = min_sleep
 
-                print(f"✅ Job {job.id} terminó. status={status} elapsed={elapsed:.1f}s")
+                if STOP:
+                    # señal entre el claim y el arranque: vuelve a la cola
+                    _requeue([job_id])
+                    break
 
-                # run_job ya marca DONE o FAILED internamente,
-                # pero por seguridad, si viniera algo raro:
-                if status == "FAILED" and job.status != "FAILED":
-                    job.mark_failed((result or {}).get("error", "Job falló sin detalle."))
-                    db.session.commit()
+                _process_job(job_id, money_tolerance, output_folder)
 
             except Exception as e:
-                print(f"❌ Error en worker: {type(e).__name__}: {e}")
+                logger.error(f"❌ Error en worker: {type(e).__name__}: {e}")
 
                 try:
                     db.session.rollback()
@@ -98,7 +170,7 @@ def main():
                     pass
 
                 # Evitar loop súper rápido en caso de error persistente
-                time.sleep(max(poll_seconds, 3))
+                _sleep(max(min_sleep, 3), wake_fd)
 
             finally:
                 # MUY importante en procesos infinitos: limpiar sesión al final de cada vuelta
@@ -107,7 +179,7 @@ def main():
                 except Exception:
                     pass
 
-    print("👋 Worker detenido.")
+    logger.info("👋 Worker detenido.")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,18 @@
 # scripts/seed_dev.py
 
-from app import create_app
-from app.extensions import db
+# Sin create_app(): para insertar un job basta un engine + Session
+# (sin blueprints, extensiones ni listeners).
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.config import Config
 from app.models import Job
 
-app = create_app()
+# misma URI que la app (postgres:// -> postgresql+pg8000://)
+engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
 
-with app.app_context():
+with Session(engine) as session:
     j = Job(naviera="COSCO", status="CREATED")
-    db.session.add(j)
-    db.session.commit()
-    print("Job creado:", j.id)
\ No newline at end of file
+    session.add(j)
+    session.commit()
+    print("Job creado:", j.id)
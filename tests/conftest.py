@@ -0,0 +1,34 @@
+# tests/conftest.py
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    App sobre SQLite en tmp_path. Los modelos viven en el schema "auditoria":
+    en SQLite se emula con un ATTACH DATABASE en cada conexión.
+    """
+    aud_path = tmp_path / "auditoria.db"
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'main.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        UPLOAD_FOLDER = str(tmp_path / "uploads")
+        OUTPUT_FOLDER = str(tmp_path / "outputs")
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        @event.listens_for(db.engine, "connect")
+        def _attach_auditoria(dbapi_conn, connection_record):
+            dbapi_conn.execute(f"ATTACH DATABASE '{aud_path}' AS auditoria")
+
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
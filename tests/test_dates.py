@@ -0,0 +1,58 @@
+# tests/test_dates.py
+
+from datetime import date, datetime
+
+import pytest
+from app.utils.dates import parse_datetime
+
+# loop original de 6 formatos: referencia de equivalencia para el dispatch
+_OLD_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%d-%m-%Y %H:%M",
+    "%d-%m-%Y",
+]
+
+
+def _old_parse(s: str):
+    for fmt in _OLD_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@pytest.mark.parametrize("s, expected", [
+    # con "/"
+    ("05/01/2024", datetime(2024, 1, 5)),
+    ("5/1/2024 7:05", datetime(2024, 1, 5, 7, 5)),
+    # ISO (fromisoformat)
+    ("2024-01-05", datetime(2024, 1, 5)),
+    ("2024-01-05 10:11:12", datetime(2024, 1, 5, 10, 11, 12)),
+    # ISO sin ceros: no es ISO exacto, lo resuelve strptime
+    ("2024-1-5", datetime(2024, 1, 5)),
+    # dd-mm-YYYY
+    ("05-01-2024", datetime(2024, 1, 5)),
+    ("5-1-2024 10:00", datetime(2024, 1, 5, 10, 0)),
+    # separador "T": ningún formato lo acepta
+    ("2024-01-05T10:11:12", None),
+    # ISO fuera de rango: fromisoformat falla y strptime también
+    ("2024-02-30", None),
+    ("2024-13-01", None),
+    ("2024-01-05 25:00:00", None),
+    ("2024-01-05 10:11:60", None),
+    ("x", None),
+])
+def test_parse_datetime_formats(s, expected):
+    assert parse_datetime(s) == expected
+    assert parse_datetime(s) == _old_parse(s)
+
+
+def test_parse_datetime_native_values():
+    assert parse_datetime(None) is None
+    assert parse_datetime("  ") is None
+    assert parse_datetime(datetime(2024, 1, 5, 8)) == datetime(2024, 1, 5, 8)
+    assert parse_datetime(date(2024, 1, 5)) == datetime(2024, 1, 5)
@@ -0,0 +1,35 @@
+# tests/test_extensions.py
+
+from types import SimpleNamespace
+
+from app.extensions import connect_with_search_path
+
+
+class _FakeConn:
+    def __init__(self):
+        self.autocommit = False
+        self.executed = []
+
+    def cursor(self):
+        conn = self
+
+        class _Cur:
+            def execute(self, sql):
+                conn.executed.append((sql, conn.autocommit))
+
+            def close(self):
+                pass
+
+        return _Cur()
+
+
+def test_search_path_only_for_postgresql():
+    sqlite = SimpleNamespace(name="sqlite", connect=lambda *a, **k: _FakeConn())
+    assert connect_with_search_path(sqlite, None, [], {}) is None  # connect() por defecto
+
+    conn = _FakeConn()
+    pg = SimpleNamespace(name="postgresql", connect=lambda *a, **k: conn)
+    assert connect_with_search_path(pg, None, [], {}) is conn
+    assert conn.executed == [("SET search_path TO auditoria, public", True)]
+    assert conn.autocommit is False
+
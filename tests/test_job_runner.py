@@ -0,0 +1,144 @@
+# tests/test_job_runner.py
+
+from openpyxl import Workbook
+
+from app.extensions import db
+from app.models import Job, JobFile, ResultContainer, ResultKPI, ResultSummary
+from app.services import job_runner
+from app.services.job_runner import run_job
+
+
+def _fils_xlsx(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Guía"
+    ws.append(["Número Guía", "Acción", "Fecha", "Estado", "Ruta", "Monto Tarifa"])
+    ws.append(["2001", "Crear", "01/10/2025 08:49", "CERRADA", "SJO", 1200])
+    ws.append(["2002", "Crear", "02/10/2025 09:15", "CERRADA", "SJO", 1500])
+
+    ws = wb.create_sheet("Contenedor")
+    ws.append(["Número Guía", "Contenedor", "Fecha", "Estado", "Acción"])
+    ws.append(["2001", "MSCU-123456-7", "01/10/2025 08:49", "OK", "Crear"])
+    ws.append(["2002", "MSCU9999999", "02/10/2025 09:15", "OK", "Crear"])
+    wb.save(str(path))
+
+
+def _cosco_xlsx(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "HOJA1"
+    ws.append(["Documento", "Total", "Contenedor"])
+    ws.append(["2001", 1000, "MSCU1234567"])
+    ws.append(["2002", 1500, "MSCU9999999"])
+    ws = wb.create_sheet("HOJA2")
+    ws.append(["Documento", "Total", "Contenedor"])
+    ws.append(["2001", 200, "MSCU1234567"])
+    wb.save(str(path))
+
+
+def _cosco_job(tmp_path) -> Job:
+    fils_path = tmp_path / "FILS.xlsx"
+    cosco_path = tmp_path / "COSCO.xlsx"
+    _fils_xlsx(fils_path)
+    _cosco_xlsx(cosco_path)
+
+    job = Job(naviera="COSCO", status="QUEUED")
+    db.session.add(job)
+    db.session.commit()
+    for file_type, path in (("FILS", fils_path), ("COSCO", cosco_path)):
+        db.session.add(JobFile(
+            job_id=job.id,
+            original_name=path.name,
+            stored_path=str(path),
+            file_type=file_type,
+            file_hash="x",
+        ))
+    db.session.commit()
+    return job
+
+
+def test_run_job_cosco_done_with_kpi(app, tmp_path):
+    job = _cosco_job(tmp_path)
+
+    result = run_job(job.id, money_tolerance=1.0, output_folder=str(tmp_path / "out"))
+
+    assert result["status"] == "DONE", result.get("error")
+    db.session.expire_all()
+    assert db.session.get(Job, job.id).status == "DONE"
+
+    kpi = ResultKPI.query.filter_by(job_id=job.id).one()
+    assert kpi.total_guias == 2
+    assert kpi.guias_ok == 2
+    assert kpi.guias_diferencia == 0
+    assert ResultSummary.query.filter_by(job_id=job.id).count() == 2
+
+
+def test_run_job_rerun_replaces_results(app, tmp_path):
+    # deletes antes de reconcile + inserts por lotes: re-correr no duplica detalle
+    job = _cosco_job(tmp_path)
+
+    counts = []
+    for _ in range(2):
+        result = run_job(job.id, money_tolerance=1.0, output_folder=str(tmp_path / "out"), export=False)
+        assert result["status"] == "DONE", result.get("error")
+        counts.append(tuple(
+            M.query.filter_by(job_id=job.id).count()
+            for M in (ResultSummary, ResultContainer, ResultKPI)
+        ))
+
+    assert counts[0] == counts[1]
+    assert counts[0][1] > 0
+
+
+def test_run_job_empty_reconciliation_is_done_empty(app, tmp_path):
+    # archivos sin guías: reconcile no produce filas
+    fils_path = tmp_path / "FILS_vacio.xlsx"
+    wb = Workbook()
+    wb.active.title = "Guía"
+    wb.active.append(["Número Guía", "Acción", "Fecha", "Estado", "Ruta", "Monto Tarifa"])
+    wb.save(str(fils_path))
+    cosco_path = tmp_path / "COSCO_vacio.xlsx"
+    wb = Workbook()
+    wb.active.append(["Documento", "Total", "Contenedor"])
+    wb.save(str(cosco_path))
+
+    job = Job(naviera="COSCO", status="QUEUED")
+    db.session.add(job)
+    db.session.commit()
+    for file_type, path in (("FILS", fils_path), ("COSCO", cosco_path)):
+        db.session.add(JobFile(
+            job_id=job.id, original_name=path.name, stored_path=str(path), file_type=file_type, file_hash="x",
+        ))
+    # resultado de una corrida anterior: un re-run vacío no lo debe borrar
+    db.session.add(ResultSummary(
+        job_id=job.id, guia="9001", estado="CERRADA", total_fils=1, total_naviera=1,
+        diferencia=0, ok=True, naviera="COSCO", fuente_naviera="X",
+    ))
+    db.session.commit()
+
+    result = run_job(job.id, money_tolerance=1.0, output_folder=str(tmp_path / "out"))
+
+    assert result["status"] == "DONE_EMPTY", result.get("error")
+    assert result["kpi"] is None
+    db.session.expire_all()
+    assert db.session.get(Job, job.id).status == "DONE_EMPTY"
+    assert ResultKPI.query.filter_by(job_id=job.id).count() == 0
+    assert [r.guia for r in ResultSummary.query.filter_by(job_id=job.id)] == ["9001"]
+
+
+def test_batch_sink_flushes_every_row_once(monkeypatch):
+    inserted = []
+    monkeypatch.setattr(
+        job_runner, "_bulk_insert", lambda model, rows: inserted.append(list(rows))
+    )
+
+    add, flush = job_runner._batch_sink(ResultSummary, lambda job_id, x: {"job_id": job_id, "n": x}, 7, n=3)
+    for i in range(7):
+        add(i)
+    assert [len(b) for b in inserted] == [3, 3]
+
+    flush()
+    flush()  # flush de más: buffer vacío, no repite filas
+    rows = [r for b in inserted for r in b]
+    assert [r["n"] for r in rows] == list(range(7))
+    assert {r["job_id"] for r in rows} == {7}
@@ -0,0 +1,13 @@
+import logging
+
+from app.utils.logging import get_logger
+
+
+def test_get_logger_uses_log_level(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "debug")
+    assert get_logger("test_log_level_ok").level == logging.DEBUG
+
+
+def test_get_logger_invalid_log_level_falls_back_to_info(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "verbose")
+    assert get_logger("test_log_level_bad").level == logging.INFO
@@ -0,0 +1,30 @@
+# tests/test_money.py
+
+from decimal import Decimal
+from app.utils.money import parse_money, parse_money_cents, cents_to_money
+
+def test_parse_money_cents_formats():
+    assert parse_money_cents(None) == 0
+    assert parse_money_cents(1200) == 120000
+    assert parse_money_cents("1.234,50") == 123450
+    assert parse_money_cents("(1,234.50)") == -123450
+    assert parse_money_cents("1234.565") == 123457  # half-up
+    assert parse_money_cents(float("nan")) == 0
+
+def test_cents_roundtrip():
+    assert cents_to_money(123450) == Decimal("1234.50")
+    assert cents_to_money(parse_money_cents("₡1,234.50")) == parse_money("₡1,234.50")
+
+def test_parse_money_cents_vs_decimal_path():
+    # parse_money conserva sub-centavos; parse_money_cents redondea half-up
+    assert parse_money("1.005") == Decimal("1.005")
+    assert parse_money_cents("1.005") == 101
+    assert parse_money_cents("1.004") == 100
+    assert parse_money_cents("-1.005") == -101
+    # "NaN" string: 0 por ambos caminos
+    assert parse_money("NaN") == 0
+    assert parse_money_cents("NaN") == 0
+    # float NaN/inf: Decimal no finito en parse_money, 0 centavos
+    assert parse_money(float("nan")).is_nan()
+    assert parse_money_cents(float("nan")) == 0
+    assert parse_money_cents(float("inf")) == 0
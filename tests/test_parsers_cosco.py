@@ -1,30 +1,45 @@
 # tests/test_parsers_cosco.py
 
-import pandas as pd
+from collections import defaultdict
+
+from openpyxl import Workbook
 from app.parsers.cosco_facturacion import COSCOFacturacionParser
 
 def test_cosco_parser_multisheet(tmp_path):
-    df1 = pd.DataFrame([
-        {"Documento": "2001", "Total": 1000, "Contenedor": "MSCU1234567"},
-        {"Documento": "2002", "Total": 1500, "Contenedor": "MSCU9999999"},
-    ])
-    df2 = pd.DataFrame([
-        {"Documento": "2001", "Total": 200, "Contenedor": "MSCU1234567"},  # extra en otra hoja
-    ])
+    header = ["Documento", "Total", "Contenedor"]
+    hoja1 = [
+        ["2001", 1000, "MSCU1234567"],
+        ["2002", 1500, "MSCU9999999"],
+    ]
+    hoja2 = [
+        ["2001", 200, "MSCU1234567"],  # extra en otra hoja
+    ]
+
+    # workbook directo con openpyxl (sin DataFrame ni ExcelWriter)
+    wb = Workbook()
+    ws1 = wb.active
+    ws1.title = "HOJA1"
+    ws2 = wb.create_sheet("HOJA2")
+    for ws, rows in ((ws1, hoja1), (ws2, hoja2)):
+        ws.append(header)
+        for r in rows:
+            ws.append(r)
 
     xlsx_path = tmp_path / "COSCO_test.xlsx"
-    with pd.ExcelWriter(xlsx_path, engine="openpyxl") as w:
-        df1.to_excel(w, sheet_name="HOJA1", index=False)
-        df2.to_excel(w, sheet_name="HOJA2", index=False)
+    wb.save(str(xlsx_path))
 
     p = COSCOFacturacionParser()
     meta = p.sniff(str(xlsx_path))
     assert meta["errors"] == []
     assert "sheets" in meta and len(meta["sheets"]) >= 2
 
-    rows = p.parse(str(xlsx_path))
+    # parse es un generador (streaming): materializar para contar
+    rows = list(p.parse(str(xlsx_path)))
     assert len(rows) == 3
-    assert any(r["guia"] == "2001" for r in rows)
+
+    by_guia = defaultdict(list)
+    for r in rows:
+        by_guia[r["guia"]].append(r)
+    assert "2001" in by_guia
     # Suma de 2001 debe poder hacerse luego en conciliación, aquí solo aseguramos que vienen las filas
-    totals_2001 = [r["total_naviera"] for r in rows if r["guia"] == "2001"]
-    assert len(totals_2001) == 2
\ No newline at end of file
+    assert len(by_guia["2001"]) == 2
\ No newline at end of file
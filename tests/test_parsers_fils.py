@@ -1,28 +1,57 @@
 # tests/test_parsers_fils.py
 
-import pandas as pd
-from app.parsers.fils_auditoria import FILSAuditoriaParser
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+from app.parsers.fils_auditoria import FILSAuditoriaParser, _parse_fecha_str
 
 def test_fils_parser_sniff_and_parse(tmp_path):
-    # Excel mínimo con columnas típicas
-    df = pd.DataFrame([
-        {"Guía": "1001", "Contenedor": "MSCU1234567", "Estado": "CERRADA", "Monto Tarifa": 1000},
-        {"Guía": "1002", "Contenedor": "MSCU9999999", "Estado": "ABIERTA", "Monto Tarifa": 500},
-    ])
+    # Excel mínimo con las hojas y columnas típicas del reporte FILS
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Guía"
+    ws.append(["Número Guía", "Acción", "Fecha", "Estado", "Monto Tarifa"])
+    ws.append(["1001", "Crear", "01/10/2025 08:49", "CERRADA", 1000])
+    ws.append(["1002", "Crear", "02/10/2025 09:15", "ABIERTA", 500])
+
+    ws = wb.create_sheet("Contenedor")
+    ws.append(["Número Guía", "Contenedor", "Fecha", "Estado", "Acción"])
+    ws.append(["1001", "MSCU1234567", "01/10/2025 08:49", "OK", "Crear"])
+    ws.append(["1002", "MSCU9999999", "02/10/2025 09:15", "OK", "Crear"])
 
     xlsx_path = tmp_path / "ReporteGuiaAuditoria_test.xlsx"
-    df.to_excel(xlsx_path, index=False)
+    wb.save(str(xlsx_path))
 
     p = FILSAuditoriaParser()
-    meta = p.sniff(str(xlsx_path))
+    report = p.sniff(str(xlsx_path))
 
-    assert "errors" in meta
-    assert meta["errors"] == []  # Debe reconocer guía
-    assert "mapped_columns" in meta
-    assert meta["mapped_columns"]["guia"] is not None
+    # sniff reporta problemas en "issues" (level ERROR/WARN)
+    assert report["ok"] is True
+    assert [i for i in report["issues"] if i["level"] == "ERROR"] == []  # Debe reconocer guía
+    assert report["meta"]["guia_header_row"] == 1
+    assert report["meta"]["guia_headers_preview"][0] == "número guía"
 
     rows = p.parse(str(xlsx_path))
     assert isinstance(rows, list)
     assert len(rows) == 2
     assert rows[0]["guia"] == "1001"
-    assert rows[0]["contenedor"] == "MSCU1234567"
\ No newline at end of file
+    assert rows[0]["contenedor"] == "MSCU1234567"
+
+
+@pytest.mark.parametrize("s, expected", [
+    # camino rápido dd/mm/YYYY HH:MM, con y sin ceros a la izquierda
+    ("01/10/2025 08:49", datetime(2025, 10, 1, 8, 49)),
+    ("1/2/2024 7:05", datetime(2024, 2, 1, 7, 5)),
+    # fecha inválida: el camino rápido falla y strptime tampoco la acepta
+    ("31/02/2024 10:00", None),
+    # con segundos: no calza el camino rápido, sale por strptime
+    ("01/10/2025 08:49:30", datetime(2025, 10, 1, 8, 49, 30)),
+    ("2025/10/01 08:49:30.250000", datetime(2025, 10, 1, 8, 49, 30, 250000)),
+    # dígitos no ASCII: int() los aceptaría, pero van al fallback (None como strptime)
+    ("٠١/٠٢/٢٠٢٤ ١٠:٠٠", None),
+    ("２/３/2024 10:00", None),
+    ("no es fecha", None),
+])
+def test_fils_parse_fecha_str(s, expected):
+    assert _parse_fecha_str(s) == expected
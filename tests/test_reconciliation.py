@@ -1,5 +1,6 @@
 # tests/test_reconciliation.py
 
+import copy
 from decimal import Decimal
 from app.services.reconciliation import reconcile
 
@@ -23,25 +24,83 @@ def test_reconciliation_last_closed_and_exceptions():
     resumen, det_cont, det_cargos, excs = reconcile(naviera, fils_rows, nav_rows, tol)
 
     # Debe incluir 3001,3002,3999
-    guias = {r.guia for r in resumen}
-    assert guias == {"3001", "3002", "3999"}
+    resumen_by = {r.guia: r for r in resumen}
+    assert resumen_by.keys() == {"3001", "3002", "3999"}
 
     # 3001 debe salir OK (1000 vs 1000)
-    r3001 = [r for r in resumen if r.guia == "3001"][0]
+    r3001 = resumen_by["3001"]
     assert r3001.estado == "CERRADA"
     assert r3001.ok is True
 
     # 3002 solo en FILS
-    r3002 = [r for r in resumen if r.guia == "3002"][0]
+    r3002 = resumen_by["3002"]
     assert r3002.total_naviera == Decimal("0")
     assert r3002.ok is False
 
     # 3999 solo en NAVIERA
-    r3999 = [r for r in resumen if r.guia == "3999"][0]
+    r3999 = resumen_by["3999"]
     assert r3999.total_fils == Decimal("0")
     assert r3999.ok is False
 
-    tipos = [e.tipo for e in excs]
+    tipos = {e.tipo for e in excs}
     assert "SOLO_EN_FILS" in tipos
     assert "SOLO_EN_NAVIERA" in tipos
-    assert "NO_CERRADA" in tipos  # por 3002
\ No newline at end of file
+    assert "NO_CERRADA" in tipos  # por 3002
+
+def _sink_case():
+    # filas nuevas en cada llamada (dos reconcile independientes)
+    fils_rows = [
+        {"guia": "4001", "estado": "CERRADA", "monto_total": 1000, "fecha_cierre": "2026-01-01",
+         "contenedor": "MSCU-123456-7", "cargos": [{"cargo": "Lavado", "monto": 50}]},
+        {"guia": "4002", "estado": "CERRADA", "monto_total": 800, "fecha_cierre": "2026-01-02",
+         "contenedor": "MSCU9999999", "cargos": []},
+    ]
+    nav_rows = [
+        {"guia": "4001", "contenedor": "MSCU1234567", "total_naviera": 1000, "sheet": "X"},
+        {"guia": "4001", "contenedor": "MSCU1234567", "total_naviera": 60, "tipo_cargo": "Lavado", "sheet": "X"},
+        {"guia": "4002", "contenedor": "MSCU9999999", "total_naviera": 800, "tipo_cargo": "Pesaje", "sheet": "X"},
+    ]
+    return fils_rows, nav_rows
+
+
+def test_reconciliation_sinks_match_returned_lists():
+    tol = Decimal("1.00")
+
+    fils_rows, nav_rows = _sink_case()
+    resumen, det_cont, det_cargos, excs = reconcile("COSCO", fils_rows, nav_rows, tol)
+    assert det_cont and det_cargos
+
+    conts, cargos = [], []
+    fils_rows, nav_rows = _sink_case()
+    s_resumen, s_cont, s_cargos, s_excs = reconcile(
+        "COSCO", fils_rows, nav_rows, tol, on_cont=conts.append, on_cargo=cargos.append
+    )
+
+    # con sinks el detalle va solo a los sinks, en el mismo orden
+    assert s_cont == [] and s_cargos == []
+    assert conts == det_cont
+    assert cargos == det_cargos
+    assert s_resumen == resumen
+    assert s_excs == excs
+
+
+def test_reconciliation_tolerance_rounds_like_amounts():
+    # tolerancia y montos pasan a centavos con el mismo half-up:
+    # 0.995 -> 100 centavos cubre una diferencia de 1.00; 0.994 -> 99 no
+    for tol, ok in ((Decimal("0.995"), True), (Decimal("0.994"), False)):
+        fils_rows = [{"guia": "5001", "estado": "CERRADA", "monto_total": "100.00", "fecha_cierre": "2026-01-01"}]
+        nav_rows = [{"guia": "5001", "total_naviera": "101.00", "sheet": "X"}]
+        resumen, _, _, _ = reconcile("COSCO", fils_rows, nav_rows, tol)
+        assert resumen[0].diferencia == Decimal("-1.00")
+        assert resumen[0].ok is ok
+
+
+def test_reconciliation_does_not_mutate_input_rows():
+    fils_rows, nav_rows = _sink_case()
+    # fila sin guía: pasa por el match por contenedor
+    nav_rows.append({"guia": "", "contenedor": "MSCU-999999-9", "total_naviera": 10, "sheet": "X"})
+    before = copy.deepcopy((fils_rows, nav_rows))
+
+    reconcile("COSCO", fils_rows, nav_rows, Decimal("1.00"))
+
+    assert (fils_rows, nav_rows) == before
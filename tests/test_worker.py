@@ -0,0 +1,55 @@
+# tests/test_worker.py
+
+from app.extensions import db
+from app.models import Job
+from app.worker import _fetch_next_job, _requeue
+
+
+def _jobs(*statuses) -> list[int]:
+    jobs = [Job(naviera="COSCO", status=s, error_message="intento previo") for s in statuses]
+    db.session.add_all(jobs)
+    db.session.commit()
+    return [j.id for j in jobs]
+
+
+def test_claim_next_takes_oldest_queued(app):
+    ids = _jobs("QUEUED", "QUEUED", "QUEUED")
+
+    claimed = Job.claim_next(2)
+    db.session.commit()
+
+    assert claimed == ids[:2]
+    db.session.expire_all()
+    by_id = {j.id: j for j in Job.query.all()}
+    for job_id in ids[:2]:
+        assert by_id[job_id].status == "RUNNING"
+        assert by_id[job_id].error_message is None
+    assert by_id[ids[2]].status == "QUEUED"
+    assert by_id[ids[2]].error_message == "intento previo"
+
+    # solo queda el tercero en la cola
+    assert Job.claim_next(5) == [ids[2]]
+    assert Job.claim_next(5) == []
+
+
+def test_fetch_next_job_claims_one_per_poll(app):
+    # uno por vuelta: el resto sigue QUEUED (nada reservado si el proceso muere)
+    ids = _jobs("QUEUED", "QUEUED")
+
+    assert _fetch_next_job() == ids[0]
+    db.session.expire_all()
+    assert [db.session.get(Job, i).status for i in ids] == ["RUNNING", "QUEUED"]
+
+    assert _fetch_next_job() == ids[1]
+    assert _fetch_next_job() is None
+
+
+def test_requeue_only_running(app):
+    running, done, failed = _jobs("RUNNING", "DONE", "FAILED")
+
+    _requeue([running, done, failed])
+
+    db.session.expire_all()
+    assert db.session.get(Job, running).status == "QUEUED"
+    assert db.session.get(Job, done).status == "DONE"
+    assert db.session.get(Job, failed).status == "FAILED"